@@ -0,0 +1,92 @@
+import pathlib
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio import transform
+
+LARGE = pytest.mark.large
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--large",
+        action="store_true",
+        default=False,
+        help="run the large workloads of the benchmarks",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "large: large workload of a benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--large"):
+        return
+    skip_large = pytest.mark.skip(reason="large workload: use --large to run")
+    for item in items:
+        if "large" in item.keywords:
+            item.add_marker(skip_large)
+
+
+@pytest.fixture
+def run(benchmark) -> Callable[..., Any]:
+    """Benchmark a function and record its peak memory.
+
+    The function is first run once with `tracemalloc` (which also warms up caches) and the peak memory [MiB] of the
+    Python and numpy allocations is saved in the `extra_info` of the benchmark.
+    The function is then timed for the given number of rounds.
+    """
+
+    def _run(func: Callable[..., Any], *args, rounds: int = 3, **kwargs) -> Any:
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_mib"] = peak / 2**20
+        return benchmark.pedantic(
+            func, args=args, kwargs=kwargs, rounds=rounds, iterations=1
+        )
+
+    return _run
+
+
+@pytest.fixture(scope="session")
+def raster(tmp_path_factory) -> Callable[..., pathlib.Path]:
+    """Create (and cache) a synthetic square raster with a side of the given number of pixels, offset in longitude.
+
+    The raster covers 1 x 1 degrees and has int16 values between 0 and 9 that form smooth blobs.
+    """
+    dir_rasters: pathlib.Path = tmp_path_factory.mktemp("rasters")
+
+    def _raster(num_pixels: int, deg_offset: float = 0.0) -> pathlib.Path:
+        path = dir_rasters / f"raster_{num_pixels}_{deg_offset}.tif"
+        if path.exists():
+            return path
+        rad = np.linspace(0, 8 * np.pi, num_pixels)
+        data = np.rint(
+            4.5 + 4.5 * np.sin(rad)[:, None] * np.cos(rad + deg_offset)[None, :]
+        ).astype(np.int16)
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            height=num_pixels,
+            width=num_pixels,
+            count=1,
+            dtype=data.dtype,
+            crs="EPSG:4326",
+            transform=transform.from_origin(
+                34.0 + deg_offset, 32.0, 1 / num_pixels, 1 / num_pixels
+            ),
+        ) as dst:
+            dst.write(data, 1)
+        return path
+
+    return _raster
@@ -0,0 +1,24 @@
+import pytest
+
+from czml3_ext import packets
+from czml3_ext.data import available_borders
+from czml3_ext.helpers import get_border
+
+
+@pytest.mark.parametrize("border", sorted(available_borders))
+def test_get_border(run, border):
+    run(get_border, border)
+
+
+@pytest.mark.parametrize("border", sorted(available_borders))
+def test_border(run, border):
+    run(packets.border, border)
+
+
+def test_all_borders(run):
+    run(packets.border, sorted(available_borders))
+
+
+@pytest.mark.parametrize("deg_tolerance", [1e-3, 1e-2])
+def test_all_borders_simplified(run, deg_tolerance):
+    run(packets.border, sorted(available_borders), deg_tolerance=deg_tolerance)
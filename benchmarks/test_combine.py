@@ -0,0 +1,47 @@
+import os
+
+import pytest
+from czml3 import CZML_VERSION, Document, Packet
+
+from czml3_ext import packets
+from czml3_ext.helpers import write_combined_docs
+
+from .conftest import LARGE
+from .test_sensor import sensor_args
+
+NUM_SENSORS = [1_000, pytest.param(20_000, marks=LARGE)]
+
+
+@pytest.fixture(scope="module", params=NUM_SENSORS)
+def documents(request, tmp_path_factory):
+    """A large document of sensors, both as a czml3.Document and as a CZML file."""
+    doc = Document(
+        packets=[Packet(id="document", name="sensors", version=CZML_VERSION)]
+        + packets.sensor(*sensor_args(request.param))
+    )
+    path = tmp_path_factory.mktemp("czml") / f"sensors_{request.param}.czml"
+    path.write_text(doc.dumps())
+    return doc, path
+
+
+def combine(documents, json_backend):
+    with open(os.devnull, "w") as fp:
+        write_combined_docs(documents, fp, json_backend=json_backend)
+
+
+@pytest.mark.parametrize("json_backend", ["json", "orjson"])
+def test_combine_documents(run, documents, json_backend):
+    if json_backend == "orjson":
+        pytest.importorskip("orjson")
+    run(combine, [documents[0]], json_backend)
+
+
+@pytest.mark.parametrize("json_backend", ["json", "orjson"])
+def test_combine_files(run, documents, json_backend):
+    if json_backend == "orjson":
+        pytest.importorskip("orjson")
+    run(combine, [documents[1]], json_backend)
+
+
+def test_document_dumps(run, documents):
+    run(documents[0].dumps)
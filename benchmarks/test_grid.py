@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from czml3_ext import packets
+from czml3_ext.helpers import get_border
+
+from .conftest import LARGE
+
+NUM_CELLS = [100, pytest.param(500, marks=LARGE), pytest.param(2_000, marks=LARGE)]
+
+
+def grid_points(num_cells):
+    deg_lat, deg_long = np.meshgrid(
+        np.linspace(29.5, 33.5, num_cells),
+        np.linspace(34.2, 35.9, num_cells),
+        indexing="ij",
+    )
+    ddm_LLA = np.zeros((num_cells**2, 3, 1))
+    ddm_LLA[:, 0, 0] = deg_lat.ravel()
+    ddm_LLA[:, 1, 0] = deg_long.ravel()
+    return ddm_LLA
+
+
+@pytest.mark.parametrize("num_cells", NUM_CELLS)
+def test_grid(run, num_cells):
+    run(packets.grid, grid_points(num_cells), rounds=1)
+
+
+@pytest.mark.parametrize("num_cells", NUM_CELLS)
+def test_grid_cut(run, num_cells):
+    run(
+        packets.grid,
+        grid_points(num_cells),
+        ddm_LLA_cut=get_border("israel"),
+        rounds=1,
+    )
@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "module", ["czml3_ext.packets", "czml3_ext.rasters", "czml3_ext.helpers"]
+)
+def test_import(run, module):
+    run(subprocess.run, [sys.executable, "-c", f"import {module}"], check=True)
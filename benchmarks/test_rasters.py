@@ -0,0 +1,91 @@
+import pytest
+
+from czml3_ext import packets, rasters
+
+from .conftest import LARGE
+
+NUM_PIXELS = [
+    1_000,
+    pytest.param(5_000, marks=LARGE),
+    pytest.param(20_000, marks=LARGE),
+]
+
+
+@pytest.mark.parametrize("tiled", [False, True])
+@pytest.mark.parametrize("num_pixels", NUM_PIXELS)
+def test_ops(run, raster, tmp_path, num_pixels, tiled):
+    run(
+        rasters.ops,
+        raster(num_pixels),
+        [3, 7],
+        ["ge", "le"],
+        out_path=tmp_path / "ops.tif",
+        tiled=tiled,
+        compress="deflate" if tiled else None,
+        num_threads=4 if tiled else 1,
+        rounds=1 if num_pixels > 1_000 else 3,
+    )
+
+
+@pytest.mark.parametrize("num_threads", [1, 4])
+@pytest.mark.parametrize("num_pixels", NUM_PIXELS)
+def test_coverage_amount(run, raster, tmp_path, num_pixels, num_threads):
+    run(
+        rasters.coverage_amount,
+        [raster(num_pixels), raster(num_pixels, 0.5)],
+        [3, 5],
+        operation_per_raster=["ge", "le"],
+        out_path=tmp_path / "coverage_amount.tif",
+        num_threads=num_threads,
+        rounds=1 if num_pixels > 1_000 else 3,
+    )
+
+
+@pytest.mark.parametrize("num_pixels", NUM_PIXELS)
+def test_coverage(run, raster, tmp_path, num_pixels):
+    path_coverage = rasters.ops(
+        raster(num_pixels), 6, "ge", out_path=tmp_path / "coverage.tif"
+    )
+    path_hole = rasters.ops(raster(num_pixels), 8, "ge", out_path=tmp_path / "hole.tif")
+    run(
+        packets.coverage,
+        path_coverage,
+        path_hole,
+        rounds=1 if num_pixels > 1_000 else 3,
+    )
+
+
+def coverage_pipeline(raster_path, in_memory):
+    if in_memory:
+        return packets.coverage(
+            rasters.ops_in_memory(raster_path, 6, "ge"),
+            rasters.ops_in_memory(raster_path, 8, "ge"),
+        )
+    return packets.coverage(
+        rasters.ops(raster_path, 6, "ge"),
+        rasters.ops(raster_path, 8, "ge"),
+        delete_rasters=True,
+    )
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+@pytest.mark.parametrize("num_pixels", NUM_PIXELS)
+def test_coverage_pipeline(run, raster, num_pixels, in_memory):
+    run(
+        coverage_pipeline,
+        raster(num_pixels),
+        in_memory,
+        rounds=1 if num_pixels > 1_000 else 3,
+    )
+
+
+@pytest.mark.parametrize("packed", [False, True])
+@pytest.mark.parametrize("num_pixels", NUM_PIXELS)
+def test_ops_mask(run, raster, num_pixels, packed):
+    run(
+        rasters.ops_packed if packed else rasters.ops_in_memory,
+        raster(num_pixels),
+        6,
+        "ge",
+        rounds=1 if num_pixels > 1_000 else 3,
+    )
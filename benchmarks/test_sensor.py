@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from czml3_ext import packets, sensors
+
+from .conftest import LARGE
+
+NUM_SENSORS = [10, 1_000, pytest.param(50_000, marks=LARGE)]
+
+
+def sensor_args(num_sensors):
+    rng = np.random.default_rng(0)
+    ddm_LLA = np.zeros((num_sensors, 3, 1))
+    ddm_LLA[:, 0, 0] = rng.uniform(29, 33, num_sensors)
+    ddm_LLA[:, 1, 0] = rng.uniform(34, 36, num_sensors)
+    ddm_LLA[:, 2, 0] = rng.uniform(0, 1000, num_sensors)
+    return (
+        ddm_LLA,
+        rng.uniform(0, 360, num_sensors),
+        rng.uniform(0, 45, num_sensors),
+        rng.choice([60, 120, 360], num_sensors),  # ellipsoids and polylines
+        rng.uniform(5, 45, num_sensors),
+        rng.uniform(1e4, 4e5, num_sensors),
+        np.where(rng.random(num_sensors) < 0.5, 0, 5e3),
+    )
+
+
+@pytest.mark.parametrize("num_sensors", NUM_SENSORS)
+def test_sensor(run, num_sensors):
+    run(
+        packets.sensor,
+        *sensor_args(num_sensors),
+        rounds=1 if num_sensors > 1_000 else 3,
+    )
+
+
+@pytest.mark.parametrize("num_sensors", NUM_SENSORS)
+def test_footprint(run, num_sensors):
+    run(
+        sensors.footprint,
+        *sensor_args(num_sensors),
+        rounds=1 if num_sensors > 1_000 else 3,
+    )
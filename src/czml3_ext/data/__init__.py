@@ -1,18 +1,26 @@
+import functools
 from pathlib import Path
 
 """
 This folder contains:
     - A collection of border files in longitude, latitude format.
     - A collection of base64 encoded billboards that can be used directly as a billboard.
+
+The listings `available_borders` and `available_billboards` are computed on first access.
 """
 
 BORDER_SUFFIX = ".border"  # csv file (comma delimitered) of longitude, latitude
 BILLBOARD_SUFFIX = ".billboard"  # plain text
 
 
-available_borders = [
-    f.name for f in Path(__file__).parent.iterdir() if f.suffix == BORDER_SUFFIX
-]
-available_billboards = [
-    f.name for f in Path(__file__).parent.iterdir() if f.suffix == BILLBOARD_SUFFIX
-]
+@functools.cache
+def _available(suffix: str) -> list[str]:
+    return [f.name for f in Path(__file__).parent.iterdir() if f.suffix == suffix]
+
+
+def __getattr__(name: str) -> list[str]:
+    if name == "available_borders":
+        return _available(BORDER_SUFFIX)
+    if name == "available_billboards":
+        return _available(BILLBOARD_SUFFIX)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
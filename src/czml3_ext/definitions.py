@@ -2,3 +2,35 @@ import numpy as np
 
 RASTER_DTYPE = np.uint8
 STR_RASTER_DTYPE = "uint8"
+
+# kinds of sensor outline polylines
+SENSOR_CORNER = 0
+SENSOR_ELEVATION_ARC = 1
+SENSOR_AZIMUTH_ARC = 2
+
+# maximum number of cached sensor arc templates (one per azimuth FOV, elevation FOV and subdivisions)
+ARC_TEMPLATE_CACHE_SIZE = 1024
+
+# precision of merged grid cells as a fraction of the smallest cell size (adjacent cell edges are snapped to it)
+GRID_MERGE_PRECISION = 1e-6
+
+# maximum number of parsed borders kept in memory
+BORDER_CACHE_SIZE = 64
+
+# environment variable of the directory of the binary (.npy) border cache (unset or "" disables it)
+ENV_CACHE_DIR = "CZML3_EXT_CACHE_DIR"
+
+# maximum number of billboards (bundled or encoded from png files) kept in memory
+BILLBOARD_CACHE_SIZE = 128
+
+# number of characters read at a time when streaming packets from CZML files
+CZML_READ_CHUNK_SIZE = 2**20
+
+# maximum number of pixels of a window of a raster that is read at a time (rasters are processed window by window)
+RASTER_WINDOW_NUM_PIXELS = 2**22
+
+# side of the blocks of tiled output rasters [px]
+RASTER_BLOCK_SIZE = 512
+
+# tolerance of the edges of rasters when they are aligned to the pixels of another raster [px]
+RASTER_PIXEL_TOLERANCE = 1e-6
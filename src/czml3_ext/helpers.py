@@ -1,24 +1,32 @@
 import base64
+import functools
+import io
 import json
+import os
 import pathlib
-from collections.abc import Sequence
+import re
+import tempfile
+from collections.abc import Callable, Iterator, Sequence
 from importlib import resources as impresources
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Literal, TextIO
 
 import czml3
 import numpy as np
 import numpy.typing as npt
 
 from . import data
-from .data import (
-    BILLBOARD_SUFFIX,
-    BORDER_SUFFIX,
-    available_billboards,
-    available_borders,
+from .data import BILLBOARD_SUFFIX, BORDER_SUFFIX
+from .definitions import (
+    BILLBOARD_CACHE_SIZE,
+    BORDER_CACHE_SIZE,
+    CZML_READ_CHUNK_SIZE,
+    ENV_CACHE_DIR,
 )
 from .errors import BillboardNotFound, BorderNotFound
 
+_RE_NON_WHITESPACE = re.compile(r"\S")
+
 
 def get_billboard(file_name: str | Path) -> str:
     """
@@ -30,43 +38,224 @@ def get_billboard(file_name: str | Path) -> str:
     file_name = Path(file_name)
     if file_name.suffix != BILLBOARD_SUFFIX:
         file_name = Path("".join((file_name.name, BILLBOARD_SUFFIX)))
+    return _load_billboard(str(file_name))
+
+
+def billboard_cache_info() -> functools._CacheInfo:
+    """Statistics of the in-memory cache of bundled billboards.
+
+    Returns
+    -------
+    functools._CacheInfo
+        Hits, misses, maximum size and current size of the cache.
+    """
+    return _load_billboard.cache_info()
+
+
+def clear_billboard_cache() -> None:
+    """Clear the in-memory caches of bundled billboards and encoded png files and their statistics."""
+    _load_billboard.cache_clear()
+    _png2base64.cache_clear()
+
+
+@functools.lru_cache(maxsize=BILLBOARD_CACHE_SIZE)
+def _load_billboard(file_name: str) -> str:
+    """Read a bundled billboard.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the billboard file, including its suffix
+
+    Returns
+    -------
+    str
+        Base64 encoded png billboard
+    """
     try:
-        with (impresources.files(data) / str(file_name)).open("r") as f:
+        with (impresources.files(data) / file_name).open("r") as f:
             return f.read().strip()
     except FileNotFoundError:
         raise BillboardNotFound(
-            f"Billboard {file_name} not found. Available billboards: {available_billboards}"
+            f"Billboard {file_name} not found. Available billboards: {data.available_billboards}"
         ) from None
 
 
-def get_border(file_name: str | Path) -> npt.NDArray[np.float64]:
+def get_border(
+    file_name: str | Path, deg_tolerance: int | float | None = None
+) -> npt.NDArray[np.float64]:
     """
     :param file_name: name of border file
-    :return: string of czml file
+    :param deg_tolerance: tolerance of the topology preserving simplification of the border [deg], by default None (no simplification)
+    :return: array of shape [n, 3, 1] of lat, long, alt (a copy of the cached border)
     """
     if isinstance(file_name, str):
         file_name = file_name.lower()
     file_name = Path(file_name)
     if file_name.suffix != BORDER_SUFFIX:
         file_name = Path("".join((file_name.name, BORDER_SUFFIX)))
-    try:
-        with (impresources.files(data) / str(file_name)).open("r") as f:
-            dd_LL = np.fromstring(f.read().strip(), sep=",").reshape((-1, 2))[:, [1, 0]]
-        ddm_LLA = np.zeros((dd_LL.shape[0], 3, 1), dtype=np.float64)
-        ddm_LLA[:, :2] = dd_LL.reshape((-1, 2, 1))
-        return ddm_LLA
-    except FileNotFoundError:
+    if deg_tolerance is None:
+        return np.array(_load_border(str(file_name)))
+    return np.array(_simplify_border(str(file_name), float(deg_tolerance)))
+
+
+def border_cache_info() -> functools._CacheInfo:
+    """Statistics of the in-memory cache of borders.
+
+    Returns
+    -------
+    functools._CacheInfo
+        Hits, misses, maximum size and current size of the cache.
+    """
+    return _load_border.cache_info()
+
+
+def clear_border_cache() -> None:
+    """Clear the in-memory caches of borders and simplified borders and their statistics.
+
+    The binary border files in the cache directory are kept.
+    """
+    _load_border.cache_clear()
+    _simplify_border.cache_clear()
+
+
+@functools.lru_cache(maxsize=BORDER_CACHE_SIZE)
+def _simplify_border(file_name: str, deg_tolerance: float) -> npt.NDArray[np.float64]:
+    """Simplified border, cached per border and tolerance.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the border file, including its suffix
+    deg_tolerance : float
+        Tolerance of the simplification [deg]
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Read-only array of shape [m, 3, 1] of lat, long, alt
+    """
+    from .shapely_helpers import simplify_LLA
+
+    ddm_LLA = simplify_LLA(_load_border(file_name), deg_tolerance)
+    ddm_LLA.setflags(write=False)
+    return ddm_LLA
+
+
+@functools.lru_cache(maxsize=BORDER_CACHE_SIZE)
+def _load_border(file_name: str) -> npt.NDArray[np.float64]:
+    """Load a border, preferring its binary (.npy) copy in the cache directory (if enabled).
+
+    The binary copy is written on first use and memory mapped afterwards.
+    It is keyed by the size and modification time of the border file, so edited borders are parsed again and their stale
+    copies are removed.
+    The returned array is read-only as it is shared by all callers.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the border file, including its suffix
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Read-only array of shape [n, 3, 1] of lat, long, alt
+    """
+    border_file = impresources.files(data) / file_name
+    if not border_file.is_file():
         raise BorderNotFound(
-            f"Billboard {file_name} not found. Available billboards: {available_borders}"
-        ) from None
+            f"Border {file_name} not found. Available borders: {data.available_borders}"
+        )
+
+    path_npy = _border_cache_path(border_file)
+    if path_npy is not None and path_npy.is_file():
+        try:
+            return np.load(path_npy, mmap_mode="r")  # type: ignore[no-any-return]
+        except (OSError, ValueError):
+            pass  # corrupt cache file: parse the border and overwrite it
+
+    with border_file.open("r") as f:
+        dd_LL = np.fromstring(f.read().strip(), sep=",").reshape((-1, 2))[:, [1, 0]]
+    ddm_LLA = np.zeros((dd_LL.shape[0], 3, 1), dtype=np.float64)
+    ddm_LLA[:, :2] = dd_LL.reshape((-1, 2, 1))
+    ddm_LLA.setflags(write=False)
+
+    if path_npy is not None:
+        try:
+            path_npy.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=path_npy.parent, suffix=".npy", delete=False
+            ) as f_tmp:
+                np.save(f_tmp, ddm_LLA)
+            os.replace(f_tmp.name, path_npy)
+            stem = Path(file_name).stem
+            for path_stale in path_npy.parent.glob(f"{stem}-*-*.npy"):
+                if path_stale != path_npy and path_stale.name.rsplit("-", 2)[0] == stem:
+                    path_stale.unlink(missing_ok=True)
+        except OSError:
+            pass  # read-only cache directory: keep the parsed border in memory only
+    return ddm_LLA
+
+
+def _border_cache_path(border_file: Any) -> Path | None:
+    """Path of the binary copy of a border file, or None if binary caching is disabled or unavailable.
+
+    Binary caching is opt-in: the cache directory is taken from the environment variable `ENV_CACHE_DIR`, and nothing is
+    written to disk if it is unset or empty.
+
+    Parameters
+    ----------
+    border_file : Any
+        Resource of the border file
+
+    Returns
+    -------
+    Path | None
+        Path of the binary (.npy) border file
+    """
+    if not isinstance(border_file, Path):
+        return None  # e.g. zipped package
+    dir_cache = os.environ.get(ENV_CACHE_DIR)
+    if not dir_cache:
+        return None
+    stat = border_file.stat()
+    return (
+        Path(dir_cache)
+        / "borders"
+        / f"{border_file.stem}-{stat.st_size}-{stat.st_mtime_ns}.npy"
+    )
 
 
 def png2base64(file_path: str | Path) -> str:
     """
-    Convert png image to billboard string for czml
+    Convert png image to billboard string for czml.
+    The encoded image is cached by the path, modification time and size of the file.
     :param file_path:
     :return:
     """
+    file_path = Path(file_path).resolve()
+    stat = file_path.stat()
+    return _png2base64(str(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=BILLBOARD_CACHE_SIZE)
+def _png2base64(file_path: str, ns_mtime: int, num_bytes: int) -> str:
+    """Encode a png file as a billboard string.
+
+    Parameters
+    ----------
+    file_path : str
+        Resolved path of the png file
+    ns_mtime : int
+        Modification time of the file [ns] (part of the cache key only)
+    num_bytes : int
+        Size of the file (part of the cache key only)
+
+    Returns
+    -------
+    str
+        Base64 encoded png billboard
+    """
     with open(file_path, "rb") as f:
         bytes_billboard = base64.b64encode(f.read())
     return "".join(("data:@file/png;base64,", bytes_billboard.decode()))
@@ -117,10 +306,12 @@ def perform_operation(
 def combine_docs(
     documents: Sequence[czml3.Document | str | pathlib.Path | list[dict[str, Any]]],
     ind_preamble: int | None = None,
+    json_backend: Literal["json", "orjson"] = "json",
 ) -> str:
     """Combine CZML documents.
 
     Accepted types: string / pathlib.Path paths to files, czml3.Document objects and list of dictionaries.
+    See `write_combined_docs` to write the combined document to a file without holding it in memory.
 
     Parameters
     ----------
@@ -128,62 +319,235 @@ def combine_docs(
         Documents to combine
     ind_preamble : int | None, optional
         Index of document to use for preamble, by default None
+    json_backend : Literal["json", "orjson"], optional
+        Serializer of the packets, by default "json" (see `write_combined_docs`)
 
     Returns
     -------
     str
         Combined document
     """
+    with io.StringIO() as fp:
+        write_combined_docs(documents, fp, ind_preamble, json_backend=json_backend)
+        return fp.getvalue()
+
 
-    def split_document(
-        packets: list[dict[str, Any]],
-    ) -> tuple[None | dict[str, Any], list[dict[str, Any]]]:
-        """Split the document into preamble and all other entities.
+def write_combined_docs(
+    documents: Sequence[czml3.Document | str | pathlib.Path | list[dict[str, Any]]],
+    fp: TextIO,
+    ind_preamble: int | None = None,
+    *,
+    chunk_size: int = CZML_READ_CHUNK_SIZE,
+    json_backend: Literal["json", "orjson"] = "json",
+) -> None:
+    """Combine CZML documents and write the combined document to a file-like object.
 
-        Parameters
-        ----------
-        packets : list[dict[str, Any]]
-            Packets of document.
+    The packets are streamed one at a time: CZML files are parsed incrementally and each packet is written as soon as it
+    is read, so that at most one packet per document is held in memory (in addition to documents that are passed as
+    czml3.Document objects and lists of dictionaries).
+    The output is the same as that of `combine_docs`.
 
-        Returns
-        -------
-        tuple[None | dict[str, Any], list[dict[str, Any]]]
-            Tuple of preamble (if no preamble found then will be `None`) and all other entities.
-        """
-        if packets[0]["id"] == "document":
-            return packets[0], packets[1:]
-        return None, packets
+    Parameters
+    ----------
+    documents : Sequence[czml3.Document  |  str  |  pathlib.Path  |  list[dict[str, Any]]]
+        Documents to combine
+    fp : TextIO
+        File-like object to write the combined document to
+    ind_preamble : int | None, optional
+        Index of document to use for preamble, by default None
+    chunk_size : int, optional
+        Number of characters read from CZML files at a time, by default `CZML_READ_CHUNK_SIZE`
+    json_backend : Literal["json", "orjson"], optional
+        Serializer of the packets, by default "json".
+        "orjson" (requires the `orjson` extra) is several times faster and writes compact JSON: czml3 packets are dumped
+        to Python objects and written by orjson, and NumPy arrays in dictionaries are written from their buffers, without
+        conversion to lists.
 
+    Raises
+    ------
+    ValueError
+        If the index of the preamble is out of range, the selected document has no preamble, a CZML file is malformed or
+        the JSON backend is unknown
+    ImportError
+        If the "orjson" backend is requested but orjson is not installed
+    FileNotFoundError
+        If a CZML file does not exist
+    TypeError
+        If a document is not of an accepted type or a path is not a CZML file
+    """
     # init + checks
     if ind_preamble is None:
         ind_preamble = 0
     if ind_preamble >= len(documents):
         raise ValueError("Index of preamble must be less than the number of documents")
-
-    out: list[dict[str, Any]] = []
-    for i_doc, doc in enumerate(documents):
-        if isinstance(doc, czml3.Document):
-            preamble_tmp, rdoc = split_document(json.loads(doc.dumps()))
-        elif isinstance(doc, list):
-            preamble_tmp, rdoc = split_document(doc)
-        elif isinstance(doc, str | pathlib.Path):
+    dumps, dumps_packet = _json_backend(json_backend)
+    for doc in documents:
+        if isinstance(doc, str | pathlib.Path):
             doc = pathlib.Path(doc)
             if not doc.exists():
                 raise FileNotFoundError
             if not (doc.is_file() and doc.suffix == ".czml"):
                 raise TypeError("Input must be a czml file")
-            with open(doc) as fp:
-                rdoc = json.load(fp)
-            preamble_tmp, rdoc = split_document(rdoc)
-        else:
+        elif not isinstance(doc, czml3.Document | list):
             raise TypeError(f"Input type not recognised: {doc}")
+    preamble = next(_iter_packets(documents[ind_preamble], chunk_size), None)
+    if preamble is None or _packet_id(preamble) != "document":
+        raise ValueError("Preamble not found in selected packet for preamble.")
 
-        out.extend(rdoc)
-        if ind_preamble == i_doc:
-            if preamble_tmp is None:
-                raise ValueError("Preamble not found in selected packet for preamble.")
-            preamble = preamble_tmp
+    separator = ", " if json_backend == "json" else ","
+    fp.write("[")
+    fp.write(_dump_packet(preamble, dumps, dumps_packet))
+    for doc in documents:
+        for i_packet, packet in enumerate(_iter_packets(doc, chunk_size)):
+            if i_packet == 0 and _packet_id(packet) == "document":
+                continue
+            fp.write(separator)
+            fp.write(_dump_packet(packet, dumps, dumps_packet))
+    fp.write("]")
+
+
+def _json_backend(
+    json_backend: Literal["json", "orjson"],
+) -> tuple[Callable[[Any], str], Callable[[czml3.Packet], str]]:
+    """Serializers of dictionaries and czml3 packets of a JSON backend.
+
+    Parameters
+    ----------
+    json_backend : Literal["json", "orjson"]
+        JSON backend
+
+    Returns
+    -------
+    tuple[Callable[[Any], str], Callable[[czml3.Packet], str]]
+        Serializer of dictionaries and serializer of czml3 packets.
+    """
+    if json_backend == "json":
+        return json.dumps, lambda packet: json.dumps(json.loads(packet.dumps()))
+    if json_backend == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError(
+                "orjson is not installed. Install it with `pip install czml3-ext[orjson]`."
+            ) from None
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+        def dumps(obj: Any) -> str:
+            return orjson.dumps(obj, option=option).decode()
+
+        # czml3 packets are dumped to Python objects by pydantic and serialized by orjson
+        return dumps, lambda packet: dumps(packet.model_dump(exclude_none=True))
+    raise ValueError(f"Unknown JSON backend: {json_backend}")
+
+
+def _packet_id(packet: czml3.Packet | dict[str, Any]) -> str | None:
+    """Id of a packet."""
+    if isinstance(packet, czml3.Packet):
+        return packet.id
+    return packet.get("id")
+
+
+def _dump_packet(
+    packet: czml3.Packet | dict[str, Any],
+    dumps: Callable[[Any], str],
+    dumps_packet: Callable[[czml3.Packet], str],
+) -> str:
+    """Serialize a packet with the serializers of a JSON backend (see `_json_backend`)."""
+    if isinstance(packet, czml3.Packet):
+        return dumps_packet(packet)
+    return dumps(packet)
+
+
+def _iter_packets(
+    doc: czml3.Document | str | pathlib.Path | list[dict[str, Any]], chunk_size: int
+) -> Iterator[czml3.Packet | dict[str, Any]]:
+    """Packets of a document, one at a time.
+
+    Parameters
+    ----------
+    doc : czml3.Document | str | pathlib.Path | list[dict[str, Any]]
+        Document
+    chunk_size : int
+        Number of characters read from CZML files at a time
+
+    Returns
+    -------
+    Iterator[czml3.Packet | dict[str, Any]]
+        Packets of the document.
+    """
+    if isinstance(doc, czml3.Document):
+        yield from doc.packets
+    elif isinstance(doc, list):
+        yield from doc
+    else:
+        yield from _iter_czml_file(pathlib.Path(doc), chunk_size)
+
+
+def _iter_czml_file(
+    file_path: pathlib.Path, chunk_size: int
+) -> Iterator[dict[str, Any]]:
+    """Parse the packets of a CZML file incrementally.
+
+    Only the packet being parsed and the unparsed part of the last chunk read are held in memory.
+    If a packet does not fit in the buffer the next read is as large as the buffer, so that large packets are parsed in
+    linear time.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        Path to the CZML file
+    chunk_size : int
+        Number of characters read at a time
+
+    Returns
+    -------
+    Iterator[dict[str, Any]]
+        Packets of the file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a JSON array of packets
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path) as f:
+        buf = ""
+        pos = 0
+        expected = "["  # "[", "packet or ]", "packet" or ", or ]"
+        while True:
+            # next token
+            match = _RE_NON_WHITESPACE.search(buf, pos)
+            if match is None:
+                buf, pos = f.read(chunk_size), 0
+                if not buf:
+                    raise ValueError(f"Unexpected end of CZML file {file_path}")
+                continue
+            pos = match.start()
+            char = buf[pos]
+            if expected == "[":
+                if char != "[":
+                    raise ValueError(f"CZML file {file_path} is not a list of packets")
+                pos += 1
+                expected = "packet or ]"
+                continue
+            if expected == ", or ]" or (expected == "packet or ]" and char == "]"):
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ValueError(f"Expected ',' at {pos} in CZML file {file_path}")
+                pos += 1
+                expected = "packet"
+                continue
 
-    if preamble is None:
-        raise ValueError("No preamble found.")
-    return json.dumps([preamble] + out)
+            # packet
+            while True:
+                try:
+                    packet, pos = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError:
+                    chunk = f.read(max(chunk_size, len(buf) - pos))
+                    if not chunk:
+                        raise
+                    buf, pos = buf[pos:] + chunk, 0
+            yield packet
+            expected = ", or ]"
@@ -1,36 +1,53 @@
+import datetime as dt
+import hashlib
+import itertools
+import json
 import pathlib
-from collections.abc import Sequence
-from typing import Any
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import numpy.typing as npt
-import rasterio
-import shapely
 from czml3 import Packet
+from czml3.base import BaseCZMLObject
 from czml3.properties import (
+    Billboard,
+    Color,
+    DistanceDisplayCondition,
     Ellipsoid,
     EllipsoidRadii,
+    Material,
     Polygon,
     Polyline,
     Position,
     PositionList,
     PositionListOfLists,
+    SolidColorMaterial,
 )
-from rasterio.features import shapes
-from shapely import geometry
-from shapely.ops import unary_union
-from transforms84.helpers import DDM2RRM, RRM2DDM, wrap
-from transforms84.systems import WGS84
-from transforms84.transforms import (
-    AER2ENU,
-    ENU2ECEF,
-    ECEF2geodetic,
+from czml3.types import (
+    DistanceDisplayConditionValue,
+    IntervalValue,
+    NumberValue,
+    TimeInterval,
+    TimeIntervalCollection,
 )
+from pydantic import BaseModel, model_serializer
 
-from .definitions import STR_RASTER_DTYPE
-from .errors import DataTypeError, MismatchedInputsError, NumDimensionsError, ShapeError
-from .helpers import get_border
-from .shapely_helpers import linear_ring2LLA, poly2LLA
+from .definitions import GRID_MERGE_PRECISION, SENSOR_CORNER, STR_RASTER_DTYPE
+from .errors import (
+    DataTypeError,
+    MismatchedInputsError,
+    NumDimensionsError,
+    ShapeError,
+)
+from .helpers import get_billboard, get_border, png2base64
+from .rasters import PackedMask, Raster
+from .sensors import _arc_subdivisions, _outline, _sensor_inputs
+
+if TYPE_CHECKING:
+    from rasterio.transform import Affine
 
 
 def sensor(
@@ -77,6 +94,9 @@ def sensor(
     subdivisions: int | Sequence[int] = 64,
     show_minimum_range_polyline: bool = True,
     max_ellipsoid_angle: float | int = 100.0,
+    m_chord_error_max: float | int | None = None,
+    levels_of_detail: Sequence[tuple[int, float | int]] | None = None,
+    workers: int | None = None,
     **update_packets,
 ) -> list[Packet]:
     """Create a sensor.
@@ -120,6 +140,18 @@ def sensor(
         Show the minimum range polylines, by default True
     max_ellipsoid_angle : float, int
         The maximum angle to create an ellipsoid - any number greater than this will create a polyline for the azimuth and elevation arcs, by default 100.0
+    m_chord_error_max : float | int | None
+        The maximum distance [m] between each azimuth and elevation arc and its polyline, by default None (use subdivisions).
+        If given then subdivisions is ignored and the number of samples is chosen per arc, so that large sensors get more samples than small sensors
+    levels_of_detail : Sequence[tuple[int, float | int]] | None
+        Pairs of subdivisions and maximum camera distance [m] of each level of detail, from the nearest level to the farthest, by default None (a single level).
+        If given then the azimuth and elevation arcs of each level are created with a distanceDisplayCondition from the maximum distance of the previous level to its own maximum distance,
+        subdivisions and m_chord_error_max are ignored, and the lines to the corners are created once and shown up to the maximum distance of the farthest level
+    workers : int | None
+        Number of processes that create the packets, by default None (a single process).
+        The sensors are split into contiguous shards, one per process, and the packets are returned in the same order as with a single process.
+        The packets of each shard are pickled back to the main process, which unpickles them one shard at a time. This takes about half as long as creating the packets, which bounds the speedup.
+        Returning JSON fragments instead would be slower still, as the main process would validate the packets again.
 
     Returns
     -------
@@ -150,94 +182,252 @@ def sensor(
         _description_
     MismatchedInputsError
         _description_
+    ValueError
+        The levels of detail are invalid
     """
 
     # checks
-    if isinstance(ddm_LLA, Sequence):
-        ddm_LLA = np.array(ddm_LLA).reshape((-1, 3, 1))
-    if ddm_LLA.ndim == 2 and ddm_LLA.shape != (3, 1):
-        raise ShapeError("A single point must be of shape (3, 1)")
-    elif ddm_LLA.ndim == 3 and ddm_LLA.shape[1:] != (3, 1):
-        raise ShapeError("Multiple points must be of shape (n, 3, 1)")
-    elif not (ddm_LLA.ndim == 2 or ddm_LLA.ndim == 3):
-        raise NumDimensionsError(
-            "Point(s) must either have two dimensions with shape (3, 1) or (n, 3, 1)"
-        )
+    (
+        ddm_LLA,
+        deg_az_broadside,
+        deg_el_broadside,
+        deg_az_FOV,
+        deg_el_FOV,
+        m_distance_max,
+        m_distance_min,
+        subdivisions_per_sensor,
+    ) = _sensor_inputs(
+        ddm_LLA,
+        deg_az_broadside,
+        deg_el_broadside,
+        deg_az_FOV,
+        deg_el_FOV,
+        m_distance_max,
+        m_distance_min,
+        subdivisions,
+        m_chord_error_max,
+    )
+    _check_levels_of_detail(levels_of_detail)
 
-    # make all inputs into sequences
-    if ddm_LLA.ndim == 2:
-        ddm_LLA = ddm_LLA[None, :]
-    if not isinstance(ddm_LLA[0, 0, 0], np.floating):
-        raise DataTypeError("Point(s) array must have a floating point data type")
-    if np.isscalar(deg_az_broadside):
-        deg_az_broadside = np.array([deg_az_broadside])
-    elif isinstance(deg_az_broadside, Sequence):
-        deg_az_broadside = np.array(deg_az_broadside)
-    elif not isinstance(deg_az_broadside, np.ndarray):
-        raise TypeError(
-            "deg_az_broadside must be an int, float, sequence or numpy array"
+    # modify additional inputs
+    add_params_per_sensor: list[dict[str, Any]] = []
+    add_params_per_sensor_polyline: list[dict[str, Any]] = []
+    add_params_per_sensor_ellipsoid: list[dict[str, Any]] = []
+    for i_sensor in range(ddm_LLA.shape[0]):
+        add_params, add_params_polyline, add_params_ellipsoid = _sensor_params(
+            update_packets, i_sensor, ddm_LLA.shape[0]
         )
-    if np.isscalar(deg_el_broadside):
-        deg_el_broadside = np.array([deg_el_broadside])
-    elif isinstance(deg_el_broadside, Sequence):
-        deg_el_broadside = np.array(deg_el_broadside)
-    elif not isinstance(deg_el_broadside, np.ndarray):
-        raise TypeError(
-            "deg_el_broadside must be an int, float, sequence or numpy array"
+        add_params_per_sensor.append(add_params)
+        add_params_per_sensor_polyline.append(add_params_polyline)
+        add_params_per_sensor_ellipsoid.append(add_params_ellipsoid)
+
+    # create packets
+    num_sensors = ddm_LLA.shape[0]
+    if workers is None or workers <= 1 or num_sensors <= 1:
+        return _sensor_packets(
+            ddm_LLA,
+            deg_az_broadside,
+            deg_el_broadside,
+            deg_az_FOV,
+            deg_el_FOV,
+            m_distance_max,
+            m_distance_min,
+            subdivisions_per_sensor,
+            show_minimum_range_polyline,
+            max_ellipsoid_angle,
+            levels_of_detail,
+            add_params_per_sensor,
+            add_params_per_sensor_polyline,
+            add_params_per_sensor_ellipsoid,
         )
-    if np.isscalar(deg_az_FOV):
-        deg_az_FOV = np.array([deg_az_FOV])
-    elif isinstance(deg_az_FOV, Sequence):
-        deg_az_FOV = np.array(deg_az_FOV)
-    elif not isinstance(deg_az_FOV, np.ndarray):
-        raise TypeError("deg_az_FOV must be an int, float, sequence or numpy array")
-    if np.isscalar(deg_el_FOV):
-        deg_el_FOV = np.array([deg_el_FOV])
-    elif isinstance(deg_el_FOV, Sequence):
-        deg_el_FOV = np.array(deg_el_FOV)
-    elif not isinstance(deg_el_FOV, np.ndarray):
-        raise TypeError("deg_el_FOV must be an int, float, sequence or numpy array")
-    if np.isscalar(m_distance_max):
-        m_distance_max = np.array([m_distance_max])
-    elif isinstance(m_distance_max, Sequence):
-        m_distance_max = np.array(m_distance_max)
-    elif not isinstance(m_distance_max, np.ndarray):
-        raise TypeError("m_distance_max must be an int, float, sequence or numpy array")
-    if m_distance_min is None:
-        m_distance_min = np.zeros_like(m_distance_max)
-    elif np.isscalar(m_distance_min):
-        m_distance_min = np.array([m_distance_min])
-    elif isinstance(m_distance_min, Sequence):
-        m_distance_min = np.array(m_distance_min)
-    elif not isinstance(m_distance_min, np.ndarray):
-        raise TypeError("m_distance_min must be an int, float, sequence or numpy array")
-    if not isinstance(subdivisions, Sequence):
-        subdivisions = [subdivisions for _ in range(ddm_LLA.shape[0])]
-    if not (
-        ddm_LLA.shape[0]
-        == deg_az_broadside.size
-        == deg_el_broadside.size
-        == deg_az_FOV.size
-        == deg_el_FOV.size
-        == m_distance_max.size
-        == m_distance_min.size
-        == len(subdivisions)
-    ):
-        raise MismatchedInputsError("All inputs must have same length")
+    i_start_per_shard = np.linspace(0, num_sensors, min(workers, num_sensors) + 1)
+    i_start_per_shard = i_start_per_shard.astype(np.int64)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _sensor_packets,
+                ddm_LLA[i_start:i_end],
+                deg_az_broadside[i_start:i_end],
+                deg_el_broadside[i_start:i_end],
+                deg_az_FOV[i_start:i_end],
+                deg_el_FOV[i_start:i_end],
+                m_distance_max[i_start:i_end],
+                m_distance_min[i_start:i_end],
+                subdivisions_per_sensor[i_start:i_end],
+                show_minimum_range_polyline,
+                max_ellipsoid_angle,
+                levels_of_detail,
+                add_params_per_sensor[i_start:i_end],
+                add_params_per_sensor_polyline[i_start:i_end],
+                add_params_per_sensor_ellipsoid[i_start:i_end],
+            )
+            for i_start, i_end in itertools.pairwise(i_start_per_shard)
+        ]
+        out: list[Packet] = []
+        for future in futures:
+            out.extend(future.result())
+    return out
 
-    # modify additional inputs
-    add_params_per_sensor: list[dict[str, Any]] = [{} for _ in range(ddm_LLA.shape[0])]
-    add_params_per_sensor_polyline: list[dict[str, Any]] = [
-        {} for _ in range(ddm_LLA.shape[0])
-    ]
-    add_params_per_sensor_ellipsoid: list[dict[str, Any]] = [
-        {} for _ in range(ddm_LLA.shape[0])
-    ]
+
+def sensor_iter(
+    ddm_LLA: Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_az_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_el_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_az_FOV: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_el_FOV: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    m_distance_max: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    m_distance_min: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.floating | np.integer]
+    | npt.NDArray[np.integer | np.floating]
+    | None = None,
+    *,
+    subdivisions: int | Sequence[int] = 64,
+    show_minimum_range_polyline: bool = True,
+    max_ellipsoid_angle: float | int = 100.0,
+    m_chord_error_max: float | int | None = None,
+    levels_of_detail: Sequence[tuple[int, float | int]] | None = None,
+    chunk_size: int = 1024,
+    **update_packets,
+) -> Iterator[Packet]:
+    """Create sensors lazily.
+
+    The packets are identical to those of `sensor`, but are yielded one at a time.
+    The geometry and the kwargs of the packets are computed for `chunk_size` sensors at a time, so the memory does not
+    depend on the number of sensors. This allows writing many sensors directly to a file, e.g. using `packet.dumps()`.
+    The inputs are checked when this function is called, not when the first packet is requested.
+
+    See `sensor` for a description of the kwargs and parameters.
+
+    Parameters
+    ----------
+    chunk_size : int
+        The number of sensors that are computed at a time, by default 1024
+
+    Returns
+    -------
+    Iterator[Packet]
+        Iterator of CZML3 packets.
+
+    Raises
+    ------
+    ValueError
+        chunk_size is smaller than 1, m_chord_error_max is not larger than 0 or the levels of detail are invalid
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be equal to or larger than 1.")
+    (
+        ddm_LLA,
+        deg_az_broadside,
+        deg_el_broadside,
+        deg_az_FOV,
+        deg_el_FOV,
+        m_distance_max,
+        m_distance_min,
+        subdivisions_per_sensor,
+    ) = _sensor_inputs(
+        ddm_LLA,
+        deg_az_broadside,
+        deg_el_broadside,
+        deg_az_FOV,
+        deg_el_FOV,
+        m_distance_max,
+        m_distance_min,
+        subdivisions,
+        m_chord_error_max,
+    )
+    _check_levels_of_detail(levels_of_detail)
+
+    def packets_per_chunk() -> Iterator[Packet]:
+        num_sensors = ddm_LLA.shape[0]
+        for i_start in range(0, num_sensors, chunk_size):
+            i_end = min(i_start + chunk_size, num_sensors)
+            add_params_per_sensor: list[dict[str, Any]] = []
+            add_params_per_sensor_polyline: list[dict[str, Any]] = []
+            add_params_per_sensor_ellipsoid: list[dict[str, Any]] = []
+            for i_sensor in range(i_start, i_end):
+                add_params, add_params_polyline, add_params_ellipsoid = _sensor_params(
+                    update_packets, i_sensor, num_sensors
+                )
+                add_params_per_sensor.append(add_params)
+                add_params_per_sensor_polyline.append(add_params_polyline)
+                add_params_per_sensor_ellipsoid.append(add_params_ellipsoid)
+            yield from _sensor_packets(
+                ddm_LLA[i_start:i_end],
+                deg_az_broadside[i_start:i_end],
+                deg_el_broadside[i_start:i_end],
+                deg_az_FOV[i_start:i_end],
+                deg_el_FOV[i_start:i_end],
+                m_distance_max[i_start:i_end],
+                m_distance_min[i_start:i_end],
+                subdivisions_per_sensor[i_start:i_end],
+                show_minimum_range_polyline,
+                max_ellipsoid_angle,
+                levels_of_detail,
+                add_params_per_sensor,
+                add_params_per_sensor_polyline,
+                add_params_per_sensor_ellipsoid,
+            )
+
+    return packets_per_chunk()
+
+
+def _sensor_params(
+    update_packets: dict[str, Any], i_sensor: int, num_sensors: int
+) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+    """Kwargs of the packets, Polyline and Ellipsoid of a single sensor.
+
+    See `sensor` for how the kwargs are assigned to each sensor.
+
+    Parameters
+    ----------
+    update_packets : dict[str, Any]
+        kwargs of `sensor`
+    i_sensor : int
+        Index of the sensor
+    num_sensors : int
+        Number of sensors
+
+    Returns
+    -------
+    tuple[dict[str, Any], dict[str, Any], dict[str, Any]]
+        kwargs of the packets, Polyline and Ellipsoid of the sensor
+    """
+    add_params: dict[str, Any] = {}
+    add_params_polyline: dict[str, Any] = {}
+    add_params_ellipsoid: dict[str, Any] = {}
     for k, v in update_packets.items():
         if isinstance(v, Polyline):
             v.__dict__.pop("positions", None)
-            for i_sensor in range(ddm_LLA.shape[0]):
-                add_params_per_sensor_polyline[i_sensor] = v.__dict__
+            add_params_polyline = v.__dict__
         elif isinstance(v, Ellipsoid):
             v.__dict__.pop("minimumClock", None)
             v.__dict__.pop("maximumClock", None)
@@ -246,493 +436,158 @@ def sensor(
             v.__dict__.pop("radii", None)
             v.__dict__.pop("innerRadii", None)
             v.__dict__.pop("outline", None)
-            for i_sensor in range(ddm_LLA.shape[0]):
-                add_params_per_sensor_ellipsoid[i_sensor] = v.__dict__
-        elif isinstance(v, Sequence) and len(v) == ddm_LLA.shape[0]:
-            for i_sensor, v1 in enumerate(v):
-                if isinstance(v1, Polyline):
-                    v1.__dict__.pop("positions", None)
-                    add_params_per_sensor_polyline[i_sensor] = v1.__dict__
-                if isinstance(v1, Ellipsoid):
-                    v1.__dict__.pop("minimumClock", None)
-                    v1.__dict__.pop("maximumClock", None)
-                    v1.__dict__.pop("minimumCone", None)
-                    v1.__dict__.pop("maximumCone", None)
-                    v1.__dict__.pop("radii", None)
-                    v1.__dict__.pop("innerRadii", None)
-                    v1.__dict__.pop("outline", None)
-                    add_params_per_sensor_ellipsoid[i_sensor] = v1.__dict__
-                else:
-                    add_params_per_sensor[i_sensor][k] = v1
+            add_params_ellipsoid = v.__dict__
+        elif isinstance(v, Sequence) and len(v) == num_sensors:
+            v1 = v[i_sensor]
+            if isinstance(v1, Polyline):
+                v1.__dict__.pop("positions", None)
+                add_params_polyline = v1.__dict__
+            if isinstance(v1, Ellipsoid):
+                v1.__dict__.pop("minimumClock", None)
+                v1.__dict__.pop("maximumClock", None)
+                v1.__dict__.pop("minimumCone", None)
+                v1.__dict__.pop("maximumCone", None)
+                v1.__dict__.pop("radii", None)
+                v1.__dict__.pop("innerRadii", None)
+                v1.__dict__.pop("outline", None)
+                add_params_ellipsoid = v1.__dict__
+            else:
+                add_params[k] = v1
         else:
-            for i_sensor in range(ddm_LLA.shape[0]):
-                add_params_per_sensor[i_sensor][k] = v
+            add_params[k] = v
+    return add_params, add_params_polyline, add_params_ellipsoid
 
-    # convert to radians
-    rrm_LLA = DDM2RRM(ddm_LLA)
-    rad_az_broadside = np.deg2rad(deg_az_broadside)
-    rad_el_broadside = np.deg2rad(deg_el_broadside)
-    rad_az_FOV = np.deg2rad(deg_az_FOV)
-    rad_el_FOV = np.deg2rad(deg_el_FOV)
 
-    out: list[Packet] = []
-    for i_sensor in range(rrm_LLA.shape[0]):
-        # use Polyline packets for outline
-        if max_ellipsoid_angle <= deg_az_FOV[i_sensor]:
-            ddm_LLA00 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        - rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        - rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_max[i_sensor]],
-                                ]
-                            )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            ddm_LLA01 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        + rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        - rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_max[i_sensor]],
-                                ]
-                            )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            ddm_LLA11 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        + rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        + rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_max[i_sensor]],
-                                ]
-                            )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            ddm_LLA10 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        - rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        + rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_max[i_sensor]],
-                                ]
-                            )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA00[1, 0],
-                                ddm_LLA00[0, 0],
-                                ddm_LLA00[2, 0],
-                            ]
-                        ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA01[1, 0],
-                                ddm_LLA01[0, 0],
-                                ddm_LLA01[2, 0],
-                            ]
-                        ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA11[1, 0],
-                                ddm_LLA11[0, 0],
-                                ddm_LLA11[2, 0],
-                            ]
-                        ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA10[1, 0],
-                                ddm_LLA10[0, 0],
-                                ddm_LLA10[2, 0],
-                            ]
-                        ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
-                )
-            )
+def _check_levels_of_detail(
+    levels_of_detail: Sequence[tuple[int, float | int]] | None,
+) -> None:
+    """Check the levels of detail of sensors.
 
-            # create arcs
-            for m_distance in (m_distance_min[i_sensor], m_distance_max[i_sensor]):
-                if m_distance == 0:
-                    continue
+    Parameters
+    ----------
+    levels_of_detail : Sequence[tuple[int, float | int]] | None
+        Pairs of subdivisions and maximum camera distance [m] of each level of detail
 
-                # elevation arcs at min/max azimuths
-                for rad_az in (
-                    rad_az_broadside[i_sensor] - rad_az_FOV[i_sensor] / 2,
-                    rad_az_broadside[i_sensor] + rad_az_FOV[i_sensor] / 2,
-                ):
-                    rad_az %= 2 * np.pi
-                    ddm_LLA_arc = []
-                    for i_arc in range(subdivisions[i_sensor]):
-                        rad_el0 = wrap(
-                            rad_el_broadside[i_sensor]
-                            - rad_el_FOV[i_sensor] / 2
-                            + rad_el_FOV[i_sensor]
-                            * i_arc
-                            / (subdivisions[i_sensor] - 1),
-                            -np.pi,
-                            np.pi,
-                        )
-                        ddm_LLA_point = RRM2DDM(
-                            ECEF2geodetic(
-                                ENU2ECEF(
-                                    rrm_LLA[i_sensor],
-                                    AER2ENU(
-                                        np.array([[rad_az], [rad_el0], [m_distance]])
-                                    ),
-                                    WGS84.a,
-                                    WGS84.b,
-                                ),
-                                WGS84.a,
-                                WGS84.b,
-                            )
-                        )
-                        ddm_LLA_arc.extend(
-                            [
-                                ddm_LLA_point[1, 0],
-                                ddm_LLA_point[0, 0],
-                                ddm_LLA_point[2, 0],
-                            ]
-                        )
-                    out.append(
-                        Packet(
-                            polyline=Polyline(
-                                positions=PositionList(cartographicDegrees=ddm_LLA_arc),
-                                **add_params_per_sensor_polyline[i_sensor],
-                            ),
-                            **add_params_per_sensor[i_sensor],
-                        )
-                    )
+    Raises
+    ------
+    ValueError
+        There are no levels, a level has less than two subdivisions or the maximum distances are not positive and increasing
+    """
+    if levels_of_detail is None:
+        return
+    if len(levels_of_detail) == 0:
+        raise ValueError("levels_of_detail must have at least one level.")
+    num_subdivisions = np.array([level[0] for level in levels_of_detail])
+    m_distance_display = np.array([level[1] for level in levels_of_detail])
+    if np.any(num_subdivisions < 2):
+        raise ValueError("Each level of detail must have at least two subdivisions.")
+    if m_distance_display[0] <= 0 or np.any(np.diff(m_distance_display) <= 0):
+        raise ValueError(
+            "The maximum distances of the levels of detail must be positive and increasing."
+        )
 
-                # azimuth arcs at min/max elevations
-                for rad_el in (
-                    rad_el_broadside[i_sensor] - rad_el_FOV[i_sensor] / 2,
-                    rad_el_broadside[i_sensor] + rad_el_FOV[i_sensor] / 2,
-                ):
-                    rad_el = wrap(rad_el, -np.pi, np.pi)
-                    ddm_LLA_arc = []
-                    for i_arc in range(subdivisions[i_sensor]):
-                        rad_az = (
-                            rad_az_broadside[i_sensor]
-                            - rad_az_FOV[i_sensor] / 2
-                            + rad_az_FOV[i_sensor]
-                            * i_arc
-                            / (subdivisions[i_sensor] - 1)
-                        ) % (2 * np.pi)
-                        ddm_LLA_point = RRM2DDM(
-                            ECEF2geodetic(
-                                ENU2ECEF(
-                                    rrm_LLA[i_sensor],
-                                    AER2ENU(
-                                        np.array([[rad_az], [rad_el], [m_distance]])
-                                    ),
-                                    WGS84.a,
-                                    WGS84.b,
-                                ),
-                                WGS84.a,
-                                WGS84.b,
-                            )
-                        )
-                        ddm_LLA_arc.extend(
-                            [
-                                ddm_LLA_point[1, 0],
-                                ddm_LLA_point[0, 0],
-                                ddm_LLA_point[2, 0],
-                            ]
-                        )
-                    out.append(
-                        Packet(
-                            polyline=Polyline(
-                                positions=PositionList(cartographicDegrees=ddm_LLA_arc),
-                                **add_params_per_sensor_polyline[i_sensor],
-                            ),
-                            **add_params_per_sensor[i_sensor],
-                        )
-                    )
 
-        # lines to inner radii if using Ellipsoid packet
-        elif m_distance_min[i_sensor] != 0 and show_minimum_range_polyline:
-            ddm_LLA00 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        - rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        - rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_min[i_sensor]],
-                                ]
-                            )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            ddm_LLA01 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        + rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        - rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_min[i_sensor]],
-                                ]
-                            )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            ddm_LLA11 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        + rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        + rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_min[i_sensor]],
-                                ]
+def _sensor_packets(
+    ddm_LLA: npt.NDArray[np.floating | np.integer],
+    deg_az_broadside: npt.NDArray[np.floating | np.integer],
+    deg_el_broadside: npt.NDArray[np.floating | np.integer],
+    deg_az_FOV: npt.NDArray[np.floating | np.integer],
+    deg_el_FOV: npt.NDArray[np.floating | np.integer],
+    m_distance_max: npt.NDArray[np.floating | np.integer],
+    m_distance_min: npt.NDArray[np.floating | np.integer],
+    subdivisions: npt.NDArray[np.integer],
+    show_minimum_range_polyline: bool,
+    max_ellipsoid_angle: float | int,
+    levels_of_detail: Sequence[tuple[int, float | int]] | None,
+    add_params_per_sensor: list[dict[str, Any]],
+    add_params_per_sensor_polyline: list[dict[str, Any]],
+    add_params_per_sensor_ellipsoid: list[dict[str, Any]],
+) -> list[Packet]:
+    """Create the packets of sensors from checked inputs.
+
+    See `sensor` for a description of the parameters.
+    The additional parameters are the kwargs of the packet, Polyline and Ellipsoid of each sensor.
+
+    Returns
+    -------
+    list[Packet]
+        List of CZML3 packets.
+    """
+    # outline of all levels of detail: each level of each sensor is treated as a sensor
+    num_sensors = ddm_LLA.shape[0]
+    if levels_of_detail is None:
+        num_levels = 1
+        m_distance_display_per_level = None
+    else:
+        num_levels = len(levels_of_detail)
+        m_distance_display_per_level = [0.0] + [
+            float(m_distance_display) for _, m_distance_display in levels_of_detail
+        ]
+        subdivisions = np.concatenate(
+            [
+                np.full((num_sensors, 8), num_subdivisions, dtype=np.int64)
+                for num_subdivisions, _ in levels_of_detail
+            ]
+        )
+    ddm_LLA_outline, i_sensor_per_polyline, kind_per_polyline, i_start_per_polyline = (
+        _outline(
+            np.tile(ddm_LLA, (num_levels, 1, 1)),
+            np.tile(deg_az_broadside, num_levels),
+            np.tile(deg_el_broadside, num_levels),
+            np.tile(deg_az_FOV, num_levels),
+            np.tile(deg_el_FOV, num_levels),
+            np.tile(m_distance_max, num_levels),
+            np.tile(m_distance_min, num_levels),
+            subdivisions,
+            show_minimum_range_polyline,
+            max_ellipsoid_angle,
+        )
+    )
+    cartographic_degrees = ddm_LLA_outline[:, [1, 0, 2], 0].ravel().tolist()
+    i_polylines_per_sensor = np.searchsorted(
+        i_sensor_per_polyline, np.arange(num_levels * num_sensors + 1)
+    )
+
+    out: list[Packet] = []
+    for i_sensor in range(num_sensors):
+        for i_level in range(num_levels):
+            i_sensor_level = i_level * num_sensors + i_sensor
+            for i_polyline in range(
+                i_polylines_per_sensor[i_sensor_level],
+                i_polylines_per_sensor[i_sensor_level + 1],
+            ):
+                add_params_polyline = add_params_per_sensor_polyline[i_sensor]
+                if m_distance_display_per_level is not None:
+                    # the lines to the corners do not depend on the level of detail
+                    if kind_per_polyline[i_polyline] == SENSOR_CORNER:
+                        if i_level > 0:
+                            continue
+                        m_distance_display = [0.0, m_distance_display_per_level[-1]]
+                    else:
+                        m_distance_display = m_distance_display_per_level[
+                            i_level : i_level + 2
+                        ]
+                    add_params_polyline = add_params_polyline | {
+                        "distanceDisplayCondition": DistanceDisplayCondition(
+                            distanceDisplayCondition=DistanceDisplayConditionValue(
+                                values=m_distance_display
                             )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            ddm_LLA10 = RRM2DDM(
-                ECEF2geodetic(
-                    ENU2ECEF(
-                        rrm_LLA[i_sensor],
-                        AER2ENU(
-                            np.array(
-                                [
-                                    [
-                                        rad_az_broadside[i_sensor]
-                                        - rad_az_FOV[i_sensor] / 2
-                                    ],
-                                    [
-                                        rad_el_broadside[i_sensor]
-                                        + rad_el_FOV[i_sensor] / 2
-                                    ],
-                                    [m_distance_min[i_sensor]],
+                        )
+                    }
+                out.append(
+                    Packet(
+                        polyline=Polyline(
+                            positions=PositionList(
+                                cartographicDegrees=cartographic_degrees[
+                                    3 * i_start_per_polyline[i_polyline] : 3
+                                    * i_start_per_polyline[i_polyline + 1]
                                 ]
-                            )
-                        ),
-                        WGS84.a,
-                        WGS84.b,
-                    ),
-                    WGS84.a,
-                    WGS84.b,
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA00[1, 0],
-                                ddm_LLA00[0, 0],
-                                ddm_LLA00[2, 0],
-                            ]
-                        ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA01[1, 0],
-                                ddm_LLA01[0, 0],
-                                ddm_LLA01[2, 0],
-                            ]
-                        ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA11[1, 0],
-                                ddm_LLA11[0, 0],
-                                ddm_LLA11[2, 0],
-                            ]
-                        ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
-                )
-            )
-            out.append(
-                Packet(
-                    polyline=Polyline(
-                        positions=PositionList(
-                            cartographicDegrees=[
-                                ddm_LLA[i_sensor, 1, 0],
-                                ddm_LLA[i_sensor, 0, 0],
-                                ddm_LLA[i_sensor, 2, 0],
-                                ddm_LLA10[1, 0],
-                                ddm_LLA10[0, 0],
-                                ddm_LLA10[2, 0],
-                            ]
+                            ),
+                            **add_params_polyline,
                         ),
-                        **add_params_per_sensor_polyline[i_sensor],
-                    ),
-                    **add_params_per_sensor[i_sensor],
+                        **add_params_per_sensor[i_sensor],
+                    )
                 )
-            )
 
         # ellipsoid
         if (
@@ -779,49 +634,562 @@ def sensor(
                         outline=bool(max_ellipsoid_angle > deg_az_FOV[i_sensor]),
                         **add_params_per_sensor_ellipsoid[i_sensor],
                     ),
-                    **add_params_per_sensor[i_sensor],
-                )
+                    **add_params_per_sensor[i_sensor],
+                )
+            )
+
+    return out
+
+
+def sensor_sampled(
+    epoch: dt.datetime,
+    s_time: Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    ddm_LLA: npt.NDArray[np.floating],
+    deg_az_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_el_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_az_FOV: int | float | np.floating | np.integer,
+    deg_el_FOV: int | float | np.floating | np.integer,
+    m_distance_max: int | float | np.floating | np.integer,
+    m_distance_min: int | float | np.floating | np.integer | None = None,
+    *,
+    subdivisions: int = 64,
+    show_minimum_range_polyline: bool = True,
+    max_ellipsoid_angle: float | int = 100.0,
+    m_chord_error_max: float | int | None = None,
+    **update_packets,
+) -> list[Packet]:
+    """Create a moving sensor from a time series of its location and broadside.
+
+    The sensor is the same as `sensor`, but every point of the outline is sampled at all times.
+    All times are calculated in a single pass.
+    Each outline point is a packet with a sampled position (that has no graphics) that is referenced by the Polyline packets.
+    Therefore, the number of packets does not depend on the number of samples.
+    If the broadside changes over time then the clock and cone angles of the Ellipsoid are given per time interval between samples.
+
+    All Polyline and Ellipsoid packets in the output may be updated using kwargs.
+    The value of each kwarg will be assigned to all CZML3 packets.
+    The following czml3.properties.Polyline properties are ignored:
+        - positions
+    The following czml3.properties.Ellipsoid properties are ignored:
+        - minimumClock
+        - maximumClock
+        - minimumCone
+        - maximumCone
+        - radii
+        - innerRadii
+        - outline
+
+    Parameters
+    ----------
+    epoch : dt.datetime
+        Epoch of the samples
+    s_time : Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Time of each sample since the epoch [s] of shape (t,)
+    ddm_LLA : npt.NDArray[np.floating]
+        Location of the sensor at each sample in LLA [deg, deg, m] of shape (t, 3, 1)
+    deg_az_broadside : int | float | np.floating | np.integer | Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Azimuth of the sensor [deg], either constant or per sample
+    deg_el_broadside : int | float | np.floating | np.integer | Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Elevation of the sensor [deg], either constant or per sample
+    deg_az_FOV : int | float | np.floating | np.integer
+        Azimuth FOV of the sensor [deg]
+    deg_el_FOV : int | float | np.floating | np.integer
+        Elevation FOV of the sensor [deg]
+    m_distance_max : int | float | np.floating | np.integer
+        Maximum range of the sensor [m]
+    m_distance_min : int | float | np.floating | np.integer | None
+        Minimum range of the sensor [m], by default None
+    subdivisions : int
+        The number of samples per azimuth and elevation arc, determining the granularity of the curvature, by default 64
+    show_minimum_range_polyline : bool
+        Show the minimum range polylines, by default True
+    max_ellipsoid_angle : float, int
+        The maximum angle to create an ellipsoid - any number greater than this will create a polyline for the azimuth and elevation arcs, by default 100.0
+    m_chord_error_max : float | int | None
+        The maximum distance [m] between each azimuth and elevation arc and its polyline, by default None (use subdivisions).
+        If given then subdivisions is ignored and each arc has the largest number of samples it needs at any time
+
+    Returns
+    -------
+    list[Packet]
+        List of CZML3 packets.
+
+    Raises
+    ------
+    NumDimensionsError
+        The locations do not have three dimensions
+    ShapeError
+        The locations are not of shape (t, 3, 1)
+    DataTypeError
+        The locations do not have a floating point data type
+    MismatchedInputsError
+        The number of times, locations and broadsides are not the same
+    ValueError
+        m_chord_error_max is not larger than 0
+    """
+    # checks
+    s_time = np.asarray(s_time)
+    if ddm_LLA.ndim != 3:
+        raise NumDimensionsError(
+            "Point(s) must have three dimensions with shape (t, 3, 1)"
+        )
+    if ddm_LLA.shape[1:] != (3, 1):
+        raise ShapeError("ddm_LLA array must have a shape of (t, 3, 1)")
+    if not np.issubdtype(ddm_LLA.dtype, np.floating):
+        raise DataTypeError("Point(s) array must have a floating point data type")
+    num_samples = ddm_LLA.shape[0]
+    deg_az_broadside = np.asarray(deg_az_broadside).ravel()
+    deg_el_broadside = np.asarray(deg_el_broadside).ravel()
+    if deg_az_broadside.size == 1:
+        deg_az_broadside = np.repeat(deg_az_broadside, num_samples)
+    if deg_el_broadside.size == 1:
+        deg_el_broadside = np.repeat(deg_el_broadside, num_samples)
+    if not (
+        num_samples == s_time.size == deg_az_broadside.size == deg_el_broadside.size
+    ):
+        raise MismatchedInputsError(
+            "The number of times, locations and broadsides must be the same"
+        )
+    if m_distance_min is None:
+        m_distance_min = 0
+    if m_chord_error_max is not None and m_chord_error_max <= 0:
+        raise ValueError("m_chord_error_max must be larger than 0.")
+
+    # modify additional inputs
+    add_params: dict[str, Any] = {}
+    add_params_polyline: dict[str, Any] = {}
+    add_params_ellipsoid: dict[str, Any] = {}
+    for k, v in update_packets.items():
+        if isinstance(v, Polyline):
+            v.__dict__.pop("positions", None)
+            add_params_polyline = v.__dict__
+        elif isinstance(v, Ellipsoid):
+            v.__dict__.pop("minimumClock", None)
+            v.__dict__.pop("maximumClock", None)
+            v.__dict__.pop("minimumCone", None)
+            v.__dict__.pop("maximumCone", None)
+            v.__dict__.pop("radii", None)
+            v.__dict__.pop("innerRadii", None)
+            v.__dict__.pop("outline", None)
+            add_params_ellipsoid = v.__dict__
+        else:
+            add_params[k] = v
+
+    # outline of all samples: each sample is treated as a sensor with the same number of samples per arc
+    subdivisions_per_arc = _arc_subdivisions(
+        deg_el_broadside,
+        np.full(num_samples, deg_az_FOV),
+        np.full(num_samples, deg_el_FOV),
+        np.full(num_samples, m_distance_max),
+        np.full(num_samples, m_distance_min),
+        np.full(num_samples, subdivisions, dtype=np.int64),
+        m_chord_error_max,
+    ).max(axis=0)
+    ddm_LLA_outline, i_sensor_per_polyline, kind_per_polyline, i_start_per_polyline = (
+        _outline(
+            ddm_LLA,
+            deg_az_broadside,
+            deg_el_broadside,
+            np.full(num_samples, deg_az_FOV),
+            np.full(num_samples, deg_el_FOV),
+            np.full(num_samples, m_distance_max),
+            np.full(num_samples, m_distance_min),
+            np.tile(subdivisions_per_arc, (num_samples, 1)),
+            show_minimum_range_polyline,
+            max_ellipsoid_angle,
+        )
+    )
+    num_polylines = int(np.count_nonzero(i_sensor_per_polyline == 0))
+    num_points = int(i_start_per_polyline[num_polylines])
+    ddm_LLA_outline = ddm_LLA_outline.reshape((num_samples, num_points, 3))
+
+    # samples of [time, longitude, latitude, altitude] of each point
+    samples = np.empty((num_points, num_samples, 4), dtype=np.float64)
+    samples[:, :, 0] = s_time
+    samples[:, :, 1:] = ddm_LLA_outline[:, :, [1, 0, 2]].transpose((1, 0, 2))
+    samples_origin = np.empty((num_samples, 4), dtype=np.float64)
+    samples_origin[:, 0] = s_time
+    samples_origin[:, 1:] = ddm_LLA[:, [1, 0, 2], 0]
+
+    # points (the first point of a corner line is the sensor itself)
+    out: list[Packet] = []
+    references: list[str] = []
+    reference_origin: str | None = None
+    for i_polyline in range(num_polylines):
+        for i_point in range(
+            i_start_per_polyline[i_polyline], i_start_per_polyline[i_polyline + 1]
+        ):
+            if (
+                kind_per_polyline[i_polyline] == SENSOR_CORNER
+                and i_point == i_start_per_polyline[i_polyline]
+            ):
+                if reference_origin is None:
+                    out.append(
+                        Packet(
+                            position=Position(
+                                epoch=epoch,
+                                cartographicDegrees=samples_origin.ravel().tolist(),
+                            )
+                        )
+                    )
+                    reference_origin = f"{out[-1].id}#position"
+                references.append(reference_origin)
+                continue
+            out.append(
+                Packet(
+                    position=Position(
+                        epoch=epoch,
+                        cartographicDegrees=samples[i_point].ravel().tolist(),
+                    )
+                )
+            )
+            references.append(f"{out[-1].id}#position")
+
+    # polylines
+    for i_polyline in range(num_polylines):
+        out.append(
+            Packet(
+                polyline=Polyline(
+                    positions=PositionList(
+                        references=references[
+                            i_start_per_polyline[i_polyline] : i_start_per_polyline[
+                                i_polyline + 1
+                            ]
+                        ]
+                    ),
+                    **add_params_polyline,
+                ),
+                **add_params,
+            )
+        )
+
+    # ellipsoid
+    if (
+        "fill" in add_params_ellipsoid
+        and add_params_ellipsoid["fill"]
+        and max_ellipsoid_angle <= deg_az_FOV
+    ) or max_ellipsoid_angle > deg_az_FOV:
+        times = [epoch + dt.timedelta(seconds=float(s)) for s in s_time]
+
+        def sampled_angle(
+            rad_angle: npt.NDArray[np.floating],
+        ) -> float | TimeIntervalCollection:
+            if np.all(rad_angle == rad_angle[0]):
+                return float(rad_angle[0])
+            return TimeIntervalCollection(
+                values=[
+                    IntervalValue(
+                        start=times[i_sample],
+                        end=times[i_sample + 1],
+                        value=NumberValue(values=float(rad_angle[i_sample])),
+                    )
+                    for i_sample in range(num_samples - 1)
+                ]
+            )
+
+        out.append(
+            Packet(
+                position=Position(
+                    epoch=epoch,
+                    cartographicDegrees=samples_origin.ravel().tolist(),
+                ),
+                ellipsoid=Ellipsoid(
+                    minimumClock=sampled_angle(
+                        np.deg2rad(90 - deg_az_broadside - deg_az_FOV / 2)
+                    ),  # east -> north
+                    maximumClock=sampled_angle(
+                        np.deg2rad(90 - deg_az_broadside + deg_az_FOV / 2)
+                    ),  # east -> north
+                    minimumCone=sampled_angle(
+                        np.deg2rad(90 - deg_el_broadside - deg_el_FOV / 2)
+                    ),  # up -> down
+                    maximumCone=sampled_angle(
+                        np.deg2rad(90 - deg_el_broadside + deg_el_FOV / 2)
+                    ),  # up -> down
+                    radii=EllipsoidRadii(
+                        cartesian=[
+                            float(m_distance_max),
+                            float(m_distance_max),
+                            float(m_distance_max),
+                        ]
+                    ),
+                    innerRadii=EllipsoidRadii(
+                        cartesian=[
+                            max(float(m_distance_min), 0.1),
+                            max(float(m_distance_min), 0.1),
+                            max(float(m_distance_min), 0.1),
+                        ]
+                    ),
+                    outline=bool(max_ellipsoid_angle > deg_az_FOV),
+                    **add_params_ellipsoid,
+                ),
+                **add_params,
+            )
+        )
+
+    return out
+
+
+def grid(
+    ddm_LLA: npt.NDArray[np.integer | np.floating]
+    | Sequence[int | float | np.floating | np.integer],
+    deg_zero_tolerance_lat: float = 10e-5,
+    deg_zero_tolerance_long: float = 10e-5,
+    *,
+    ddm_LLA_cut: None
+    | npt.NDArray[np.floating]
+    | Sequence[int | float | np.floating | np.integer] = None,
+    deg_delta_lat: float | None = None,
+    deg_delta_long: float | None = None,
+    merge_cells: bool = False,
+    **update_packets,
+) -> list[Packet]:
+    """Make a grid in CZML.
+
+    The coordinates entered are the centre points of the grid.
+    64 bit floats are recommended if the grid has high resolution.
+    To support non-contiguous grids it is assumed that the resolution of the grid (in longitude and latitude) is the
+    smallest difference between points. The resolution may also be given using deg_delta_lat and deg_delta_long, in which
+    case it is not calculated.
+
+    If the polygons of the grid are extremely small then play with deg_zero_tolerance_lat and deg_zero_tolerance_long: increasing these values will find the correct minimum latittudes and longitudes (in degrees).
+
+    All packets in the output may be updated using kwargs.
+    If the value of the kwarg is a sequence with the length of the number of grid points then each value will be assigned to the CZML3 packet of it's corresponding grid point.
+    If the value of the kwarg is not a sequence with the length of the number of grid points then the value will be assigned to the CZML3 packets of all grid points.
+    Note that the following czml3.properties.Polygon properties are ignored:
+        - positions
+
+    If merge_cells is True then the cells with identical kwargs (compared by value) are merged: each group of adjacent
+    cells becomes a single polygon (with holes if needed, replacing the holes of the Polygon kwarg), ordered by the first
+    cell of the kwargs. This greatly reduces the number of packets of grids with few styles, e.g. heatmaps.
+
+    Parameters
+    ----------
+    ddm_LLA : npt.NDArray[np.integer | np.floating] | Sequence[int | float | np.floating | np.integer]
+        3D numpy array or sequence containing lat [deg], long [deg], alt [m] points
+    deg_zero_tolerance_lat : float
+        Tolerance of 0 degrees for latittude
+    deg_zero_tolerance_long : float
+        Tolerance of 0 degrees for longitude
+    ddm_LLA_cut : None | npt.NDArray[np.floating] | Sequence[int | float | np.floating | np.integer]
+        3D numpy array or sequence containing lat [deg], long [deg], alt [m] points that will cut the polygons.
+    deg_delta_lat : float | None
+        Resolution of the grid along latitude [deg], by default None (the smallest difference between latitudes)
+    deg_delta_long : float | None
+        Resolution of the grid along longitude [deg], by default None (the smallest difference between longitudes)
+    merge_cells : bool
+        Merge adjacent cells with identical kwargs into polygons, by default False
+
+    Returns
+    -------
+    list[Packet]
+        List of CZML3 packets.
+
+    Raises
+    ------
+    TypeError
+        _description_
+    NumDimensionsError
+        _description_
+    ShapeError
+        _description_
+    NumDimensionsError
+        _description_
+    ShapeError
+        _description_
+    ValueError
+        A tolerance or resolution is negative or the resolution cannot be calculated
+    """
+    # checks
+    ddm_LLA, ddm_LLA_cut, deg_delta_lat, deg_delta_long = _grid_inputs(
+        ddm_LLA,
+        deg_zero_tolerance_lat,
+        deg_zero_tolerance_long,
+        ddm_LLA_cut,
+        deg_delta_lat,
+        deg_delta_long,
+    )
+
+    # modify additional inputs
+    add_params_per_square: list[dict[str, Any]] = [{} for _ in range(ddm_LLA.shape[0])]
+    add_params_per_square_polygon: list[dict[str, Any]] = [
+        {} for _ in range(ddm_LLA.shape[0])
+    ]
+    for k, v in update_packets.items():
+        if isinstance(v, Polygon):
+            v.__dict__.pop("positions", None)
+            for i_sensor in range(ddm_LLA.shape[0]):
+                add_params_per_square_polygon[i_sensor] = v.__dict__
+        elif isinstance(v, Sequence) and len(v) == ddm_LLA.shape[0]:
+            for i_sensor, v1 in enumerate(v):
+                if isinstance(v1, Polygon):
+                    v1.__dict__.pop("positions", None)
+                    add_params_per_square_polygon[i_sensor] = v1.__dict__
+                else:
+                    add_params_per_square[i_sensor][k] = v1
+        else:
+            for i_sensor in range(ddm_LLA.shape[0]):
+                add_params_per_square[i_sensor][k] = v
+
+    # cells of the grid
+    num_cells = ddm_LLA.shape[0]
+    ddm_LLA_polygons, is_inside, is_boundary, polys_intersect = _grid_cells(
+        ddm_LLA, deg_delta_lat, deg_delta_long, ddm_LLA_cut
+    )
+
+    # merge cells with the same kwargs
+    if merge_cells:
+        import shapely
+
+        from .shapely_helpers import linear_ring2LLA, poly2LLA
+
+        polys_cell_long_lat = np.empty(num_cells, dtype=object)
+        polys_cell_long_lat[is_inside] = shapely.polygons(
+            ddm_LLA_polygons[is_inside][:, :, :2]
+        )
+        polys_cell_long_lat[is_boundary] = shapely.transform(
+            polys_intersect[is_boundary], lambda coords: coords[:, ::-1]
+        )
+        i_cells_per_params: dict[str, list[int]] = {}
+        for i_centre in np.flatnonzero(is_inside | is_boundary):
+            i_cells_per_params.setdefault(
+                json.dumps(
+                    (
+                        add_params_per_square[i_centre],
+                        add_params_per_square_polygon[i_centre],
+                    ),
+                    sort_keys=True,
+                    default=_params_key_default,
+                ),
+                [],
+            ).append(i_centre)
+        out_merged: list[Packet] = []
+        for i_cells in i_cells_per_params.values():
+            poly_merged = shapely.union_all(
+                polys_cell_long_lat[i_cells],
+                grid_size=min(deg_delta_lat, deg_delta_long) * GRID_MERGE_PRECISION,
             )
+            for polygon in shapely.get_parts(poly_merged):
+                if not isinstance(polygon, shapely.Polygon) or polygon.is_empty:
+                    continue
+                ddm_polygon = poly2LLA(polygon)
+                ddm_holes = [
+                    linear_ring2LLA(interior)[:, [1, 0, 2]].ravel().tolist()
+                    for interior in polygon.interiors
+                ]
+                out_merged.append(
+                    Packet(
+                        polygon=Polygon(
+                            positions=PositionList(
+                                cartographicDegrees=ddm_polygon[:, [1, 0, 2]]
+                                .ravel()
+                                .tolist()
+                            ),
+                            holes=PositionListOfLists(cartographicDegrees=ddm_holes)
+                            if len(ddm_holes) > 0
+                            else None,
+                            **{
+                                k: v
+                                for k, v in add_params_per_square_polygon[
+                                    i_cells[0]
+                                ].items()
+                                if k != "holes"
+                            },
+                        ),
+                        **add_params_per_square[i_cells[0]],
+                    )
+                )
+        return out_merged
 
+    # build grid
+    out: list[Packet] = []
+    for i_centre, ddm_LLA_polygon in _grid_polygons(
+        ddm_LLA_polygons, is_inside, is_boundary, polys_intersect
+    ):
+        out.append(
+            Packet(
+                polygon=Polygon(
+                    positions=PositionList(cartographicDegrees=ddm_LLA_polygon),
+                    **add_params_per_square_polygon[i_centre],
+                ),
+                **add_params_per_square[i_centre],
+            )
+        )
     return out
 
 
-def grid(
+def grid_sampled(
     ddm_LLA: npt.NDArray[np.integer | np.floating]
     | Sequence[int | float | np.floating | np.integer],
+    epoch: dt.datetime,
+    s_time: Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    values: npt.NDArray[np.floating | np.integer],
+    rgba_colormap: Sequence[Sequence[int | float]]
+    | npt.NDArray[np.floating | np.integer],
+    value_edges: Sequence[int | float] | npt.NDArray[np.floating | np.integer],
+    *,
     deg_zero_tolerance_lat: float = 10e-5,
     deg_zero_tolerance_long: float = 10e-5,
-    *,
     ddm_LLA_cut: None
     | npt.NDArray[np.floating]
     | Sequence[int | float | np.floating | np.integer] = None,
+    deg_delta_lat: float | None = None,
+    deg_delta_long: float | None = None,
     **update_packets,
 ) -> list[Packet]:
-    """Make a grid in CZML.
+    """Make a grid in CZML with a colour per cell that changes over time.
 
-    The coordinates entered are the centre points of the grid.
-    64 bit floats are recommended if the grid has high resolution.
-    To support non-contiguous grids it is assumed that the resolution of the grid (in longitude and latitude) is the
-    smallest difference between points.
-
-    If the polygons of the grid are extremely small then play with deg_zero_tolerance_lat and deg_zero_tolerance_long: increasing these values will find the correct minimum latittudes and longitudes (in degrees).
+    The cells are the same as those of `grid`. The value of each cell in each time interval is mapped to a colour of the
+    colormap: values smaller than value_edges[0] get the first colour, values between value_edges[i - 1] and
+    value_edges[i] get colour i and values equal to or larger than value_edges[-1] get the last colour.
+    The colour of each cell is a solid colour material with a colour per time interval, where consecutive time intervals
+    with the same colour are merged into a single interval. The colours are mapped for all cells and times at once and each
+    colour of the colormap is a single object that is shared by all intervals.
 
     All packets in the output may be updated using kwargs.
     If the value of the kwarg is a sequence with the length of the number of grid points then each value will be assigned to the CZML3 packet of it's corresponding grid point.
     If the value of the kwarg is not a sequence with the length of the number of grid points then the value will be assigned to the CZML3 packets of all grid points.
     Note that the following czml3.properties.Polygon properties are ignored:
         - positions
+        - material
 
     Parameters
     ----------
     ddm_LLA : npt.NDArray[np.integer | np.floating] | Sequence[int | float | np.floating | np.integer]
         3D numpy array or sequence containing lat [deg], long [deg], alt [m] points
+    epoch : dt.datetime
+        Epoch of the times
+    s_time : Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Start and end times of the time intervals since the epoch [s] of shape (t + 1,)
+    values : npt.NDArray[np.floating | np.integer]
+        Value of each cell in each time interval of shape (n, t)
+    rgba_colormap : Sequence[Sequence[int | float]] | npt.NDArray[np.floating | np.integer]
+        Colours [Red, Green, Blue, Alpha] in the range 0-255 of shape (k, 4)
+    value_edges : Sequence[int | float] | npt.NDArray[np.floating | np.integer]
+        Increasing values that separate the colours of shape (k - 1,)
     deg_zero_tolerance_lat : float
         Tolerance of 0 degrees for latittude
     deg_zero_tolerance_long : float
         Tolerance of 0 degrees for longitude
     ddm_LLA_cut : None | npt.NDArray[np.floating] | Sequence[int | float | np.floating | np.integer]
         3D numpy array or sequence containing lat [deg], long [deg], alt [m] points that will cut the polygons.
+    deg_delta_lat : float | None
+        Resolution of the grid along latitude [deg], by default None (the smallest difference between latitudes)
+    deg_delta_long : float | None
+        Resolution of the grid along longitude [deg], by default None (the smallest difference between longitudes)
 
     Returns
     -------
@@ -830,22 +1198,159 @@ def grid(
 
     Raises
     ------
-    TypeError
-        _description_
-    NumDimensionsError
-        _description_
     ShapeError
-        _description_
+        The values, times or colormap do not have the expected shapes
+    MismatchedInputsError
+        The number of values does not match the number of cells, times or colours
+    """
+    # checks
+    ddm_LLA, ddm_LLA_cut, deg_delta_lat, deg_delta_long = _grid_inputs(
+        ddm_LLA,
+        deg_zero_tolerance_lat,
+        deg_zero_tolerance_long,
+        ddm_LLA_cut,
+        deg_delta_lat,
+        deg_delta_long,
+    )
+    s_time = np.asarray(s_time).ravel()
+    rgba_colormap = np.asarray(rgba_colormap)
+    value_edges = np.asarray(value_edges).ravel()
+    if values.ndim != 2:
+        raise ShapeError("values array must have a shape of (n, t)")
+    if rgba_colormap.ndim != 2 or rgba_colormap.shape[1] != 4:
+        raise ShapeError("rgba_colormap array must have a shape of (k, 4)")
+    num_cells = ddm_LLA.shape[0]
+    if values.shape[0] != num_cells:
+        raise MismatchedInputsError(
+            "The number of values must be equal to the number of cells"
+        )
+    if values.shape[1] + 1 != s_time.size:
+        raise MismatchedInputsError(
+            "The number of times must be one more than the number of values of each cell"
+        )
+    if rgba_colormap.shape[0] != value_edges.size + 1:
+        raise MismatchedInputsError(
+            "The number of colours must be one more than the number of value edges"
+        )
+
+    # colour of each cell in each time interval, with consecutive intervals of the same colour merged
+    i_colour = np.searchsorted(value_edges, values, side="right")
+    is_start = np.ones(values.shape, dtype=np.bool_)
+    is_start[:, 1:] = i_colour[:, 1:] != i_colour[:, :-1]
+    i_cell_per_interval, i_start_per_interval = np.nonzero(is_start)
+    i_end_per_interval = np.empty_like(i_start_per_interval)
+    i_end_per_interval[:-1] = i_start_per_interval[1:]
+    i_end_per_interval[np.diff(i_cell_per_interval, append=num_cells) != 0] = (
+        values.shape[1]
+    )
+    i_first_interval_per_cell = np.searchsorted(
+        i_cell_per_interval, np.arange(num_cells + 1)
+    )
+    time_per_edge = [epoch + dt.timedelta(seconds=float(s)) for s in s_time]
+    colour_per_colormap = [Color(rgba=rgba) for rgba in rgba_colormap.tolist()]
+    i_colour_per_interval = i_colour[i_cell_per_interval, i_start_per_interval].tolist()
+    i_start_per_interval_list = i_start_per_interval.tolist()
+    i_end_per_interval_list = i_end_per_interval.tolist()
+
+    # modify additional inputs
+    add_params: dict[str, Any] = {}
+    add_params_per_square: dict[str, Sequence[Any]] = {}
+    add_params_polygon: dict[str, Any] = {}
+    for k, v in update_packets.items():
+        if isinstance(v, Polygon):
+            v.__dict__.pop("positions", None)
+            v.__dict__.pop("material", None)
+            add_params_polygon = v.__dict__
+        elif isinstance(v, Sequence) and len(v) == num_cells:
+            add_params_per_square[k] = v
+        else:
+            add_params[k] = v
+
+    # build grid
+    ddm_LLA_polygons, is_inside, is_boundary, polys_intersect = _grid_cells(
+        ddm_LLA, deg_delta_lat, deg_delta_long, ddm_LLA_cut
+    )
+    out: list[Packet] = []
+    material_per_cell: dict[int, Material] = {}
+    for i_centre, ddm_LLA_polygon in _grid_polygons(
+        ddm_LLA_polygons, is_inside, is_boundary, polys_intersect
+    ):
+        if i_centre not in material_per_cell:
+            material_per_cell[i_centre] = Material(
+                solidColor=SolidColorMaterial(
+                    color=TimeIntervalCollection(
+                        values=[
+                            IntervalValue(
+                                start=time_per_edge[i_start_per_interval_list[i]],
+                                end=time_per_edge[i_end_per_interval_list[i]],
+                                value=colour_per_colormap[i_colour_per_interval[i]],
+                            )
+                            for i in range(
+                                i_first_interval_per_cell[i_centre],
+                                i_first_interval_per_cell[i_centre + 1],
+                            )
+                        ]
+                    )
+                )
+            )
+        out.append(
+            Packet(
+                polygon=Polygon(
+                    positions=PositionList(cartographicDegrees=ddm_LLA_polygon),
+                    material=material_per_cell[i_centre],
+                    **add_params_polygon,
+                ),
+                **add_params,
+                **{k: v[i_centre] for k, v in add_params_per_square.items()},
+            )
+        )
+    return out
+
+
+def _grid_inputs(
+    ddm_LLA: npt.NDArray[np.integer | np.floating]
+    | Sequence[int | float | np.floating | np.integer],
+    deg_zero_tolerance_lat: float,
+    deg_zero_tolerance_long: float,
+    ddm_LLA_cut: None
+    | npt.NDArray[np.floating]
+    | Sequence[int | float | np.floating | np.integer],
+    deg_delta_lat: float | None,
+    deg_delta_long: float | None,
+) -> tuple[
+    npt.NDArray[np.integer | np.floating],
+    npt.NDArray[np.floating] | None,
+    float,
+    float,
+]:
+    """Check the inputs of a grid and calculate its resolution.
+
+    See `grid` for a description of the parameters.
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.integer | np.floating], npt.NDArray[np.floating] | None, float, float]
+        Centres of shape (n, 3, 1) with zero altitude, border of shape (m, 3, 1) (if given) and resolution along latitude and
+        longitude of the grid.
+
+    Raises
+    ------
     NumDimensionsError
-        _description_
+        The centres or border do not have three dimensions
     ShapeError
-        _description_
+        The centres or border are not of shape (n, 3, 1)
+    ValueError
+        A tolerance or resolution is negative or the resolution cannot be calculated
     """
     # checks
     if deg_zero_tolerance_lat < 0:
         raise ValueError("deg_zero_tolerance_lat must be equal to or larger than 0.")
     if deg_zero_tolerance_long < 0:
         raise ValueError("deg_zero_tolerance_long must be equal to or larger than 0.")
+    if deg_delta_lat is not None and deg_delta_lat <= 0:
+        raise ValueError("deg_delta_lat must be larger than 0.")
+    if deg_delta_long is not None and deg_delta_long <= 0:
+        raise ValueError("deg_delta_long must be larger than 0.")
     if isinstance(ddm_LLA, Sequence):
         ddm_LLA = np.array(ddm_LLA).reshape((-1, 3, 1))
     if ddm_LLA.ndim != 3:
@@ -866,104 +1371,306 @@ def grid(
         raise ShapeError("ddm_LLA_border array must have a shape of (n, 3, 1)")
 
     # range along latitude and longitude
-    deg_deltas_lat = np.abs(ddm_LLA[:, 0, 0, np.newaxis] - ddm_LLA[:, 0, 0])
-    deg_delta_lat = np.min(deg_deltas_lat[deg_deltas_lat > deg_zero_tolerance_lat])
-    deg_deltas_long = np.abs(ddm_LLA[:, 1, 0, np.newaxis] - ddm_LLA[:, 1, 0])
-    deg_delta_long = np.min(deg_deltas_long[deg_deltas_long > deg_zero_tolerance_long])
+    if deg_delta_lat is None:
+        deg_delta_lat = _grid_spacing(ddm_LLA[:, 0, 0], deg_zero_tolerance_lat)
+    if deg_delta_long is None:
+        deg_delta_long = _grid_spacing(ddm_LLA[:, 1, 0], deg_zero_tolerance_long)
+    return ddm_LLA, ddm_LLA_cut, deg_delta_lat, deg_delta_long
+
+
+def _grid_cells(
+    ddm_LLA: npt.NDArray[np.integer | np.floating],
+    deg_delta_lat: float,
+    deg_delta_long: float,
+    ddm_LLA_cut: npt.NDArray[np.floating] | None,
+) -> tuple[
+    npt.NDArray[np.float64],
+    npt.NDArray[np.bool_],
+    npt.NDArray[np.bool_],
+    npt.NDArray[np.object_],
+]:
+    """Corners of the cells of a grid and their position relative to the border.
+
+    Only the cells on the boundary of the border are intersected with it.
+
+    Parameters
+    ----------
+    ddm_LLA : npt.NDArray[np.integer | np.floating]
+        Centres of the cells of shape (n, 3, 1)
+    deg_delta_lat : float
+        Resolution of the grid along latitude [deg]
+    deg_delta_long : float
+        Resolution of the grid along longitude [deg]
+    ddm_LLA_cut : npt.NDArray[np.floating] | None
+        Border of shape (m, 3, 1) that cuts the cells
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.float64], npt.NDArray[np.bool_], npt.NDArray[np.bool_], npt.NDArray[np.object_]]
+        Corners of the cells in [long, lat, alt] of shape (n, 4, 3), whether each cell is inside the border, whether each cell
+        is on the boundary of the border and the intersection (in [lat, long]) of each cell on the boundary with the border
+    """
+    num_cells = ddm_LLA.shape[0]
+    ddm_LLA_polygons = np.zeros((num_cells, 4, 3), dtype=np.float64)
+    ddm_LLA_polygons[:, [0, 1], 0] = (ddm_LLA[:, 1, 0] - deg_delta_long / 2)[:, None]
+    ddm_LLA_polygons[:, [2, 3], 0] = (ddm_LLA[:, 1, 0] + deg_delta_long / 2)[:, None]
+    ddm_LLA_polygons[:, [0, 3], 1] = (ddm_LLA[:, 0, 0] - deg_delta_lat / 2)[:, None]
+    ddm_LLA_polygons[:, [1, 2], 1] = (ddm_LLA[:, 0, 0] + deg_delta_lat / 2)[:, None]
+
+    polys_intersect = np.empty(num_cells, dtype=object)
+    if ddm_LLA_cut is None:
+        is_inside = np.ones(num_cells, dtype=np.bool_)
+        is_boundary = np.zeros(num_cells, dtype=np.bool_)
+    else:
+        import shapely
+
+        poly_border = shapely.Polygon(ddm_LLA_cut[:, :2, 0])
+        shapely.prepare(poly_border)
+        polys_cell = shapely.polygons(ddm_LLA_polygons[:, :, [1, 0]])
+        is_inside = shapely.contains(poly_border, polys_cell)
+        is_boundary = ~is_inside & shapely.intersects(poly_border, polys_cell)
+        polys_intersect[is_boundary] = shapely.intersection(
+            poly_border, polys_cell[is_boundary]
+        )
+    return ddm_LLA_polygons, is_inside, is_boundary, polys_intersect
+
+
+def _grid_polygons(
+    ddm_LLA_polygons: npt.NDArray[np.float64],
+    is_inside: npt.NDArray[np.bool_],
+    is_boundary: npt.NDArray[np.bool_],
+    polys_intersect: npt.NDArray[np.object_],
+) -> Iterator[tuple[int, list[float]]]:
+    """Positions of the polygons of the cells of a grid, in the order of the cells.
+
+    See `_grid_cells` for a description of the parameters.
+    Cells inside the border have a single polygon and cells on the boundary of the border have a polygon per part of their
+    intersection with the border.
+
+    Returns
+    -------
+    Iterator[tuple[int, list[float]]]
+        Index of the cell and cartographic degrees of each polygon.
+    """
+    if np.any(is_boundary):
+        import shapely
+
+    ddm_LLA_polygon_per_cell = ddm_LLA_polygons.reshape(
+        (ddm_LLA_polygons.shape[0], -1)
+    ).tolist()
+    for i_centre in range(ddm_LLA_polygons.shape[0]):
+        if is_inside[i_centre]:
+            yield i_centre, ddm_LLA_polygon_per_cell[i_centre]
+        elif is_boundary[i_centre]:
+            for poly_intersect in shapely.get_parts(polys_intersect[i_centre]):
+                if not isinstance(poly_intersect, shapely.Polygon):
+                    continue
+                np_ddm_LLA_polygon = np.zeros(
+                    (len(poly_intersect.exterior.coords.xy[0]), 3), dtype=np.float32
+                )
+                np_ddm_LLA_polygon[:, :2] = np.array(
+                    poly_intersect.exterior.coords.xy
+                ).T.reshape((-1, 2))[:, [1, 0]]
+                yield i_centre, np_ddm_LLA_polygon.ravel().tolist()
+
+
+def _params_key_default(obj: Any) -> Any:
+    """Convert kwargs of packets that are not JSON serializable, so that identical kwargs have the same key in `grid`.
+
+    Parameters
+    ----------
+    obj : Any
+        Value of a kwarg (or part of it)
+
+    Returns
+    -------
+    Any
+        JSON serializable value.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(exclude_none=True)
+    if isinstance(obj, np.ndarray | np.generic):
+        return obj.tolist()
+    if isinstance(obj, dt.date | dt.time | dt.timedelta):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    return repr(obj)
+
+
+def _grid_spacing(
+    deg_values: npt.NDArray[np.floating | np.integer], deg_zero_tolerance: float
+) -> float:
+    """The smallest difference between values that is larger than the tolerance.
+
+    The values are sorted, so that the smallest difference larger than the tolerance from each value is to the first
+    value that is larger than it by more than the tolerance.
+
+    Parameters
+    ----------
+    deg_values : npt.NDArray[np.floating | np.integer]
+        Latitudes or longitudes of the centres of the grid [deg]
+    deg_zero_tolerance : float
+        Tolerance of 0 degrees
+
+    Returns
+    -------
+    float
+        Resolution of the grid [deg]
+
+    Raises
+    ------
+    ValueError
+        There are no differences larger than the tolerance
+    """
+    deg_values_sorted = np.unique(deg_values)
+    i_next = np.searchsorted(
+        deg_values_sorted, deg_values_sorted + deg_zero_tolerance, side="right"
+    )
+    has_next = i_next < deg_values_sorted.size
+    if not np.any(has_next):
+        raise ValueError(
+            "The resolution of the grid cannot be calculated: there are no differences larger than the tolerance."
+        )
+    return float(
+        np.min(deg_values_sorted[i_next[has_next]] - deg_values_sorted[has_next])
+    )
+
+
+def grid_raster(
+    raster_path: str | pathlib.Path,
+    classifier: Callable[[npt.NDArray[Any]], npt.NDArray[np.integer]],
+    num_classes: int,
+    *,
+    band: int = 1,
+    window_size: int = 512,
+    **update_packets,
+) -> Iterator[Packet]:
+    """Make a grid in CZML from the pixels of a raster.
+
+    Each pixel of the raster is a cell of the grid, with bounds given by the transform of the raster (that must be in
+    longitude and latitude). The raster is read in square windows of `window_size` pixels, so the memory does not depend
+    on the size of the raster, and the packets are yielded one window at a time (ordered by row and column of the
+    windows and then by row and column of the pixels).
+
+    The classifier maps the values of the pixels of a window (a 2D array) to the class of each pixel (a 2D integer array of
+    the same shape). Pixels of a negative class and pixels with no data are not in the grid.
+
+    All packets in the output may be updated using kwargs.
+    If the value of the kwarg is a sequence with the length of the number of classes then each value will be assigned to the CZML3 packets of the cells of it's corresponding class.
+    If the value of the kwarg is not a sequence with the length of the number of classes then the value will be assigned to the CZML3 packets of all cells.
+    Note that the following czml3.properties.Polygon properties are ignored:
+        - positions
+
+    Parameters
+    ----------
+    raster_path : str | pathlib.Path
+        Path to the raster
+    classifier : Callable[[npt.NDArray[Any]], npt.NDArray[np.integer]]
+        Function that returns the class of each pixel of a window of the raster
+    num_classes : int
+        The number of classes
+    band : int
+        Band of the raster, by default 1
+    window_size : int
+        The number of rows and columns of pixels that are read at a time, by default 512
+
+    Returns
+    -------
+    Iterator[Packet]
+        Iterator of CZML3 packets.
+
+    Raises
+    ------
+    ValueError
+        window_size or num_classes is smaller than 1, the raster is not in longitude and latitude or the classifier
+        returns a class equal to or larger than num_classes (raised when iterating over the window of the class)
+    """
+    # checks
+    if window_size < 1:
+        raise ValueError("window_size must be equal to or larger than 1.")
+    if num_classes < 1:
+        raise ValueError("num_classes must be equal to or larger than 1.")
+    import rasterio
+    from rasterio.windows import Window
+
+    with rasterio.open(raster_path) as src:
+        if src.crs is not None and not src.crs.is_geographic:
+            raise ValueError("The raster must be in longitude and latitude.")
 
     # modify additional inputs
-    add_params_per_square: list[dict[str, Any]] = [{} for _ in range(ddm_LLA.shape[0])]
-    add_params_per_square_polygon: list[dict[str, Any]] = [
-        {} for _ in range(ddm_LLA.shape[0])
+    add_params_per_class: list[dict[str, Any]] = [{} for _ in range(num_classes)]
+    add_params_per_class_polygon: list[dict[str, Any]] = [
+        {} for _ in range(num_classes)
     ]
     for k, v in update_packets.items():
         if isinstance(v, Polygon):
             v.__dict__.pop("positions", None)
-            for i_sensor in range(ddm_LLA.shape[0]):
-                add_params_per_square_polygon[i_sensor] = v.__dict__
-        elif isinstance(v, Sequence) and len(v) == ddm_LLA.shape[0]:
-            for i_sensor, v1 in enumerate(v):
+            for i_class in range(num_classes):
+                add_params_per_class_polygon[i_class] = v.__dict__
+        elif isinstance(v, Sequence) and len(v) == num_classes:
+            for i_class, v1 in enumerate(v):
                 if isinstance(v1, Polygon):
                     v1.__dict__.pop("positions", None)
-                    add_params_per_square_polygon[i_sensor] = v1.__dict__
+                    add_params_per_class_polygon[i_class] = v1.__dict__
                 else:
-                    add_params_per_square[i_sensor][k] = v1
+                    add_params_per_class[i_class][k] = v1
         else:
-            for i_sensor in range(ddm_LLA.shape[0]):
-                add_params_per_square[i_sensor][k] = v
-
-    # build grid
-    if ddm_LLA_cut is not None:
-        poly_border = shapely.Polygon(ddm_LLA_cut[:, :2, 0])
-    out: list[Packet] = []
-    for i_centre in range(ddm_LLA.shape[0]):
-        # build polygon
-        ddm_LLA_polygon = [
-            float(ddm_LLA[i_centre, 1, 0] - deg_delta_long / 2),
-            float(ddm_LLA[i_centre, 0, 0] - deg_delta_lat / 2),
-            0.0,
-            float(ddm_LLA[i_centre, 1, 0] - deg_delta_long / 2),
-            float(ddm_LLA[i_centre, 0, 0] + deg_delta_lat / 2),
-            0.0,
-            float(ddm_LLA[i_centre, 1, 0] + deg_delta_long / 2),
-            float(ddm_LLA[i_centre, 0, 0] + deg_delta_lat / 2),
-            0.0,
-            float(ddm_LLA[i_centre, 1, 0] + deg_delta_long / 2),
-            float(ddm_LLA[i_centre, 0, 0] - deg_delta_lat / 2),
-            0.0,
-        ]
+            for i_class in range(num_classes):
+                add_params_per_class[i_class][k] = v
 
-        # cut with border
-        if ddm_LLA_cut is not None:
-            poly_polygon = shapely.Polygon(
-                np.array(ddm_LLA_polygon).T.reshape((-1, 3, 1))[:, [1, 0], 0]
-            )
-            if not (
-                poly_border.contains(poly_polygon)
-                or poly_border.intersects(poly_polygon)
-            ):
-                continue
-            elif poly_border.intersects(poly_polygon):
-                poly_intersects = poly_border.intersection(poly_polygon)
-                if isinstance(poly_intersects, shapely.Polygon):
-                    poly_intersects = [poly_intersects]
-                elif isinstance(poly_intersects, shapely.MultiPolygon):
-                    poly_intersects = list(poly_intersects.geoms)
-                for poly_intersect in poly_intersects:
-                    np_ddm_LLA_polygon = np.zeros(
-                        (len(poly_intersect.exterior.coords.xy[0]), 3), dtype=np.float32
+    def packets_per_window() -> Iterator[Packet]:
+        with rasterio.open(raster_path) as src:
+            for row_off in range(0, src.height, window_size):
+                for col_off in range(0, src.width, window_size):
+                    window = Window(
+                        col_off,
+                        row_off,
+                        min(window_size, src.width - col_off),
+                        min(window_size, src.height - row_off),
                     )
-                    np_ddm_LLA_polygon[:, :2] = np.array(
-                        poly_intersect.exterior.coords.xy
-                    ).T.reshape((-1, 2))[:, [1, 0]]
-                    ddm_LLA_polygon = np_ddm_LLA_polygon.ravel().tolist()
-                    out.append(
-                        Packet(
+                    data = src.read(band, window=window, masked=True)
+                    class_per_pixel = np.asarray(classifier(data.data))
+                    rows, cols = np.nonzero(
+                        (class_per_pixel >= 0) & ~np.ma.getmaskarray(data)
+                    )
+                    if rows.size == 0:
+                        continue
+                    class_per_cell = class_per_pixel[rows, cols]
+                    if np.any(class_per_cell >= num_classes):
+                        raise ValueError(
+                            f"The classifier returned class {class_per_cell.max()} but there are only {num_classes} classes."
+                        )
+
+                    # corners of the cells, in the order of `grid`
+                    rows_corner = row_off + rows[:, None] + np.array([1, 0, 0, 1])
+                    cols_corner = col_off + cols[:, None] + np.array([0, 0, 1, 1])
+                    deg_long, deg_lat = src.transform * (cols_corner, rows_corner)
+                    ddm_LLA_polygons = np.zeros((rows.size, 4, 3), dtype=np.float64)
+                    ddm_LLA_polygons[:, :, 0] = deg_long
+                    ddm_LLA_polygons[:, :, 1] = deg_lat
+                    for ddm_LLA_polygon, i_class in zip(
+                        ddm_LLA_polygons.reshape((rows.size, -1)).tolist(),
+                        class_per_cell.tolist(),
+                        strict=True,
+                    ):
+                        yield Packet(
                             polygon=Polygon(
                                 positions=PositionList(
                                     cartographicDegrees=ddm_LLA_polygon
                                 ),
-                                **add_params_per_square_polygon[i_centre],
+                                **add_params_per_class_polygon[i_class],
                             ),
-                            **add_params_per_square[i_centre],
+                            **add_params_per_class[i_class],
                         )
-                    )
-        else:
-            out.append(
-                Packet(
-                    polygon=Polygon(
-                        positions=PositionList(cartographicDegrees=ddm_LLA_polygon),
-                        **add_params_per_square_polygon[i_centre],
-                    ),
-                    **add_params_per_square[i_centre],
-                )
-            )
-    return out
+
+    return packets_per_window()
 
 
 def border(
     borders: str | npt.NDArray[np.floating] | Sequence[str | npt.NDArray[np.floating]],
     steps: int | Sequence[int] = 1,
+    deg_tolerance: int | float | Sequence[int | float | None] | None = None,
     **update_packets,
 ) -> list[Packet]:
     """Create a CZML3 packet of a border.
@@ -980,6 +1687,10 @@ def border(
         The border(s) packets requested
     step : int, Sequence[int], optional
         Step of border points, by default 1
+    deg_tolerance : int | float | Sequence[int | float | None] | None, optional
+        Tolerance of the topology preserving simplification of the border(s) [deg], by default None (no simplification).
+        Unlike `steps`, the simplification keeps the points that define the shape of the border.
+        Simplified named borders are cached per tolerance.
 
     Returns
     -------
@@ -995,6 +1706,8 @@ def border(
         borders = [borders]
     if isinstance(steps, int):
         steps = [steps for _ in range(len(borders))]
+    if deg_tolerance is None or isinstance(deg_tolerance, int | float):
+        deg_tolerance = [deg_tolerance for _ in range(len(borders))]
 
     # modify additional inputs
     add_params_per_border: list[dict[str, Any]] = [{} for _ in range(len(borders))]
@@ -1021,9 +1734,14 @@ def border(
     for i_border in range(len(borders)):
         b = borders[i_border]
         if isinstance(b, str):
-            ddm_LLA_border = get_border(b)
+            ddm_LLA_border = get_border(b, deg_tolerance[i_border])
         elif isinstance(borders[i_border], np.ndarray):
             ddm_LLA_border = b  # type: ignore  # TODO FIX
+            deg_tolerance_border = deg_tolerance[i_border]
+            if deg_tolerance_border is not None:
+                from .shapely_helpers import simplify_LLA
+
+                ddm_LLA_border = simplify_LLA(ddm_LLA_border, deg_tolerance_border)
         else:
             raise TypeError(
                 "borders must either be a str or a numpy array of shape [n, 3, 1] of lat, long, alt."
@@ -1047,9 +1765,77 @@ def border(
     return out
 
 
+def billboard_image(
+    billboard: str | pathlib.Path, packet_id: str | None = None
+) -> tuple[Packet, TimeIntervalCollection]:
+    """Create a CZML3 packet holding a billboard image and a reference to it.
+
+    Add the packet to the document once and use the reference as the image of the billboards of all other packets
+    (e.g. `Billboard(image=reference, scale=0.5)`), so that the base64 encoded image is written once instead of in every
+    packet.
+    The billboard of the returned packet is hidden.
+
+    Parameters
+    ----------
+    billboard : str | pathlib.Path
+        Name of a bundled billboard (see `czml3_ext.data.available_billboards`), path to a png file or a data URI of an image
+    packet_id : str | None, optional
+        Id of the packet, by default None (derived from the image, so the same image always has the same id)
+
+    Returns
+    -------
+    tuple[Packet, TimeIntervalCollection]
+        CZML3 packet of the image and the reference to its image.
+    """
+    if isinstance(billboard, pathlib.Path) or billboard.lower().endswith(".png"):
+        image = png2base64(billboard)
+    elif billboard.startswith("data:"):
+        image = billboard
+    else:
+        image = get_billboard(billboard)
+    if packet_id is None:
+        packet_id = f"billboard_{hashlib.sha1(image.encode()).hexdigest()[:16]}"
+
+    ti = TimeInterval()
+    return Packet(id=packet_id, billboard=Billboard(image=image, show=False)), (
+        TimeIntervalCollection(
+            values=[
+                IntervalValue(
+                    start=ti.start,
+                    end=ti.end,
+                    value=_Reference(reference=f"{packet_id}#billboard.image"),
+                )
+            ]
+        )
+    )
+
+
+class _Reference(BaseCZMLObject):
+    """Reference to a property of another packet.
+
+    czml3 serialises `Uri(reference=...)` as a plain string (i.e. a URI) so the reference is written as an interval of
+    the property instead.
+    """
+
+    reference: str
+
+    @model_serializer
+    def _serialize(self) -> dict[str, str]:
+        return {"reference": self.reference}
+
+
 def coverage(
-    raster_paths_coverage: Sequence[str | pathlib.Path] | str | pathlib.Path,
-    raster_paths_hole: Sequence[str | pathlib.Path] | str | pathlib.Path | None = None,
+    raster_paths_coverage: Sequence[str | pathlib.Path | Raster | PackedMask]
+    | str
+    | pathlib.Path
+    | Raster
+    | PackedMask,
+    raster_paths_hole: Sequence[str | pathlib.Path | Raster | PackedMask]
+    | str
+    | pathlib.Path
+    | Raster
+    | PackedMask
+    | None = None,
     band_per_raster_coverage: int | Sequence[int] = 1,
     band_per_raster_hole: int | Sequence[int] = 1,
     *,
@@ -1059,6 +1845,10 @@ def coverage(
     """Create czml3 packets of coverage (including holes).
 
     The rasters must have a data type of `RASTER_DTYPE`.
+    Rasters may be files or rasters in memory (see `czml3_ext.rasters.Raster`), e.g. `coverage(rasters.ops_in_memory(...))`
+    which does not write and read temporary files. The band of rasters in memory is ignored.
+    Bit-packed masks (see `czml3_ext.rasters.PackedMask`) are unpacked one at a time, and 1 bit GeoTIFFs are read as
+    `RASTER_DTYPE`.
 
     All packets in the output may be updated using kwargs.
     Each value of the kwarg will be assigned to all CZML3 packets.
@@ -1068,16 +1858,16 @@ def coverage(
 
     Parameters
     ----------
-    raster_paths_coverage : Sequence[str  |  pathlib.Path] | str | pathlib.Path
-        Path(s) to the raster(s) that will be used for coverage.
-    raster_paths_hole : Sequence[str  |  pathlib.Path] | str | pathlib.Path | None, optional
-        Path(s) to the raster(s) that will be used for holes, by default None
+    raster_paths_coverage : Sequence[str  |  pathlib.Path  |  Raster  |  PackedMask] | str | pathlib.Path | Raster | PackedMask
+        Path(s) to the raster(s) (or raster(s) in memory) that will be used for coverage.
+    raster_paths_hole : Sequence[str  |  pathlib.Path  |  Raster  |  PackedMask] | str | pathlib.Path | Raster | PackedMask | None, optional
+        Path(s) to the raster(s) (or raster(s) in memory) that will be used for holes, by default None
     band_per_raster_coverage : int | Sequence[int], optional
         Band(s) of each coverage raster, by default 1
     band_per_raster_hole : int | Sequence[int], optional
         Band(s) of each hole raster, by default 1
     delete_rasters : bool, optional
-        If True then the function will delete the inputted rasters, by default False
+        If True then the function will delete the inputted raster files, by default False
 
     Returns
     -------
@@ -1096,7 +1886,7 @@ def coverage(
         Raised if the hole raster is not of type `RASTER_DTYPE`.
     """
     # init
-    if isinstance(raster_paths_coverage, str | pathlib.Path):
+    if isinstance(raster_paths_coverage, str | pathlib.Path | Raster | PackedMask):
         raster_paths_coverage = [raster_paths_coverage]
     if not isinstance(band_per_raster_coverage, Sequence):
         band_per_raster_coverage = [band_per_raster_coverage] * len(
@@ -1104,12 +1894,18 @@ def coverage(
         )
     if raster_paths_hole is None:
         raster_paths_hole = []
-    if isinstance(raster_paths_hole, str | pathlib.Path):
+    if isinstance(raster_paths_hole, str | pathlib.Path | Raster | PackedMask):
         raster_paths_hole = [raster_paths_hole]
     if not isinstance(band_per_raster_hole, Sequence):
         band_per_raster_hole = [band_per_raster_hole] * len(raster_paths_hole)
-    fpath_rasters_coverages = list(map(pathlib.Path, raster_paths_coverage))
-    fpath_rasters_holes = list(map(pathlib.Path, raster_paths_hole))
+    fpath_rasters_coverages = [
+        r if isinstance(r, Raster | PackedMask) else pathlib.Path(r)
+        for r in raster_paths_coverage
+    ]
+    fpath_rasters_holes = [
+        r if isinstance(r, Raster | PackedMask) else pathlib.Path(r)
+        for r in raster_paths_hole
+    ]
 
     # checks
     if len(fpath_rasters_coverages) != len(band_per_raster_coverage):
@@ -1120,40 +1916,37 @@ def coverage(
         raise ValueError(
             "The number of hole rasters must be equal to the number of provided bands."
         )
+    import shapely
+    from rasterio.features import shapes
+    from shapely import geometry
+    from shapely.ops import unary_union
+
+    from .shapely_helpers import linear_ring2LLA, poly2LLA
 
     polys_coverage: list[shapely.Polygon] = []
     for raster_path, band in zip(
         fpath_rasters_coverages, band_per_raster_coverage, strict=False
     ):
-        with rasterio.open(raster_path) as src:
-            if src.dtypes[band - 1] != STR_RASTER_DTYPE:
-                raise ValueError(f"Raster must be of type {STR_RASTER_DTYPE}.")
-            raster_data = src.read(band)
-            for geom, _ in shapes(
-                raster_data, mask=raster_data, transform=src.transform
-            ):
-                # if np.isin(value, target_value):
-                polys_coverage.append(geometry.shape(geom))
+        raster_data, tf = _read_raster(raster_path, band)
+        for geom, _ in shapes(raster_data, mask=raster_data, transform=tf):
+            # if np.isin(value, target_value):
+            polys_coverage.append(geometry.shape(geom))
 
     polys_hole: list[shapely.Polygon] = []
     for raster_path, band in zip(
         fpath_rasters_holes, band_per_raster_hole, strict=False
     ):
-        with rasterio.open(raster_path) as src:
-            if src.dtypes[band - 1] != STR_RASTER_DTYPE:
-                raise ValueError(f"Raster must be of type {STR_RASTER_DTYPE}.")
-            raster_data = src.read(band)
-            for geom, _ in shapes(
-                raster_data, mask=raster_data, transform=src.transform
-            ):
-                # if np.isin(value, target_value):
-                polys_hole.append(geometry.shape(geom))
+        raster_data, tf = _read_raster(raster_path, band)
+        for geom, _ in shapes(raster_data, mask=raster_data, transform=tf):
+            # if np.isin(value, target_value):
+            polys_hole.append(geometry.shape(geom))
 
     # delete raster files
     if delete_rasters:
         for paths in (fpath_rasters_coverages, fpath_rasters_holes):
             for path in paths:
-                path.unlink()
+                if isinstance(path, pathlib.Path):
+                    path.unlink()
 
     # remove holes from coverage polygons
     multipolygon_coverage_per_sensor = unary_union(polys_coverage)
@@ -1200,3 +1993,40 @@ def coverage(
             )
         )
     return out
+
+
+def _read_raster(
+    raster_path: pathlib.Path | Raster | PackedMask, band: int
+) -> tuple[npt.NDArray[np.uint8], "Affine"]:
+    """Read a band of a raster file, or the data of a raster in memory, of type `RASTER_DTYPE`.
+
+    Parameters
+    ----------
+    raster_path : pathlib.Path | Raster | PackedMask
+        Path to the raster or raster in memory (packed masks are unpacked)
+    band : int
+        Band of the raster file
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.uint8], Affine]
+        Data and affine transform of the raster.
+
+    Raises
+    ------
+    ValueError
+        Raised if the raster is not of type `RASTER_DTYPE`.
+    """
+    if isinstance(raster_path, PackedMask):
+        raster_path = raster_path.unpack()
+    if isinstance(raster_path, Raster):
+        if raster_path.data.dtype != STR_RASTER_DTYPE:
+            raise ValueError(f"Raster must be of type {STR_RASTER_DTYPE}.")
+        return raster_path.data, raster_path.transform
+
+    import rasterio
+
+    with rasterio.open(raster_path) as src:
+        if src.dtypes[band - 1] != STR_RASTER_DTYPE:
+            raise ValueError(f"Raster must be of type {STR_RASTER_DTYPE}.")
+        return src.read(band), src.transform
@@ -1,19 +1,85 @@
+import collections
+import contextlib
 import pathlib
 import tempfile
-from collections.abc import Sequence
-from typing import Literal
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, TypeVar
 
 import numpy as np
-import rasterio
-from rasterio import transform
-from rasterio.warp import Resampling, reproject
+import numpy.typing as npt
 
-from .definitions import RASTER_DTYPE
+from .definitions import (
+    RASTER_BLOCK_SIZE,
+    RASTER_DTYPE,
+    RASTER_PIXEL_TOLERANCE,
+    RASTER_WINDOW_NUM_PIXELS,
+)
 from .helpers import perform_operation
 
+if TYPE_CHECKING:
+    from rasterio.crs import CRS
+    from rasterio.io import DatasetReader
+    from rasterio.transform import Affine
+    from rasterio.warp import Resampling
+    from rasterio.windows import Window
+
+T = TypeVar("T")
+
+
+class Raster(NamedTuple):
+    """A single band raster in memory.
+
+    Rasters in memory may be used instead of raster files in `ops`, `coverage_amount` and `czml3_ext.packets.coverage`,
+    e.g. `packets.coverage(rasters.ops_in_memory(raster_path, 5))`, to avoid writing and reading temporary files.
+    """
+
+    data: npt.NDArray[Any]
+    """Values of the raster of shape (height, width)"""
+    transform: "Affine"
+    """Affine transform of the raster"""
+    crs: "CRS | str | None"
+    """Coordinate reference system of the raster"""
+
+
+class PackedMask(NamedTuple):
+    """A single band boolean raster in memory with 8 pixels per byte (see `np.packbits`).
+
+    Masks of the same grid may be combined without unpacking, e.g. `np.bitwise_or(mask_0.bits, mask_1.bits)`.
+    Packed masks may be used instead of raster files in `ops` and `czml3_ext.packets.coverage`.
+    """
+
+    bits: npt.NDArray[np.uint8]
+    """Pixels of the mask packed along each row, of shape (height, ceil(width / 8))"""
+    width: int
+    """Width of the mask [px]"""
+    transform: "Affine"
+    """Affine transform of the mask"""
+    crs: "CRS | str | None"
+    """Coordinate reference system of the mask"""
+
+    @classmethod
+    def from_raster(cls, raster: Raster) -> "PackedMask":
+        """Pack the non-zero pixels of a raster."""
+        return cls(
+            np.packbits(raster.data != 0, axis=1),
+            raster.data.shape[1],
+            raster.transform,
+            raster.crs,
+        )
+
+    def unpack(self) -> Raster:
+        """Unpack the mask to a raster of type `RASTER_DTYPE`."""
+        return Raster(
+            np.unpackbits(self.bits, axis=1, count=self.width),
+            self.transform,
+            self.crs,
+        )
+
 
 def ops(
-    raster_path: str | pathlib.Path,
+    raster_path: str | pathlib.Path | Raster | PackedMask,
     values: int | float | Sequence[int | float],
     operation_per_value: Literal["eq", "ge", "le", "g", "l"]
     | Sequence[Literal["eq", "ge", "le", "g", "l"]] = "eq",
@@ -22,13 +88,21 @@ def ops(
     band: int = 1,
     overwrite_file: bool = True,
     error_if_no_data: bool = True,
+    tiled: bool = False,
+    compress: str | None = None,
+    num_threads: int = 1,
+    bit_packed: bool = False,
 ) -> pathlib.Path:
     """Create a raster representing the result of multiple operations on a raster.
 
+    The raster is processed window by window (the blocks of the raster, see `_windows`), so the memory used is bounded by
+    the size of a window regardless of the size of the raster.
+    With multiple threads the windows are read and processed concurrently, and written in order.
+
     Parameters
     ----------
-    raster_path : str | pathlib.Path
-        Path to the raster.
+    raster_path : str | pathlib.Path | Raster | PackedMask
+        Path to the raster or raster in memory.
     values : int | float | Sequence[int  |  float]
         Target numbers of each operation.
     operation_per_value : Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;] | Sequence[Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;]], optional
@@ -41,6 +115,15 @@ def ops(
         Overwrite the output file if True else raise an error if the file exists, by default True
     error_if_no_data : bool, optional
         Raise an error if no data is found in the raster, by default True
+    tiled : bool, optional
+        Write a tiled output raster with blocks of `RASTER_BLOCK_SIZE` pixels, by default False
+    compress : str | None, optional
+        Compression of the output raster (e.g. "deflate" or "lzw"), by default None
+    num_threads : int, optional
+        Number of threads that process windows concurrently, by default 1
+    bit_packed : bool, optional
+        Write a 1 bit (NBITS=1) GeoTIFF, which is 8 times smaller when uncompressed and is read as `RASTER_DTYPE`, by
+        default False
 
     Returns
     -------
@@ -52,7 +135,7 @@ def ops(
     FileExistsError
         If the output file already exists and `overwrite_file` is False.
     ValueError
-        If the number of rasters, target values, operations and bands are not the same.
+        If the number of values and operations are not the same or the number of threads is smaller than 1.
     """
     # init
     if out_path is None:
@@ -63,6 +146,163 @@ def ops(
         out_path.unlink()
     elif out_path.exists():
         raise FileExistsError(f"File {out_path} already exists.")
+    values, operation_per_value = _ops_inputs(values, operation_per_value, num_threads)
+
+    # perform operations window by window
+    import rasterio
+
+    has_data = False
+    with _open(raster_path) as src:
+        out_meta = src.meta.copy()
+        out_meta.update(
+            dtype=RASTER_DTYPE,
+            nodata=None,
+            count=1,
+            **_profile(tiled, compress, bit_packed),
+        )
+        with rasterio.open(out_path, "w", **out_meta) as dst:
+            for window, mask in _ops_windows(
+                src, values, operation_per_value, band, num_threads
+            ):
+                has_data |= bool(np.any(mask))
+                dst.write(mask, 1, window=window)
+
+    if error_if_no_data and not has_data:
+        out_path.unlink()
+        raise ValueError("Created raster is empty.")
+    return out_path
+
+
+def ops_in_memory(
+    raster_path: str | pathlib.Path | Raster | PackedMask,
+    values: int | float | Sequence[int | float],
+    operation_per_value: Literal["eq", "ge", "le", "g", "l"]
+    | Sequence[Literal["eq", "ge", "le", "g", "l"]] = "eq",
+    *,
+    band: int = 1,
+    error_if_no_data: bool = True,
+    num_threads: int = 1,
+) -> Raster:
+    """Create a raster in memory representing the result of multiple operations on a raster.
+
+    Same as `ops`, without writing the result to a file.
+
+    Parameters
+    ----------
+    raster_path : str | pathlib.Path | Raster | PackedMask
+        Path to the raster or raster in memory.
+    values : int | float | Sequence[int  |  float]
+        Target numbers of each operation.
+    operation_per_value : Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;] | Sequence[Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;]], optional
+        Operation to perform on each value, by default "eq"
+    band : int, optional
+        Band of geotiff, by default 1
+    error_if_no_data : bool, optional
+        Raise an error if no data is found in the raster, by default True
+    num_threads : int, optional
+        Number of threads that process windows concurrently, by default 1
+
+    Returns
+    -------
+    Raster
+        Raster in memory of type `RASTER_DTYPE`.
+
+    Raises
+    ------
+    ValueError
+        If the number of values and operations are not the same or the number of threads is smaller than 1.
+    """
+    values, operation_per_value = _ops_inputs(values, operation_per_value, num_threads)
+
+    with _open(raster_path) as src:
+        data = np.zeros((src.height, src.width), dtype=RASTER_DTYPE)
+        for window, mask in _ops_windows(
+            src, values, operation_per_value, band, num_threads
+        ):
+            data[window.toslices()] = mask
+        out = Raster(data, src.transform, src.crs)
+
+    if error_if_no_data and not np.any(data):
+        raise ValueError("Created raster is empty.")
+    return out
+
+
+def ops_packed(
+    raster_path: str | pathlib.Path | Raster | PackedMask,
+    values: int | float | Sequence[int | float],
+    operation_per_value: Literal["eq", "ge", "le", "g", "l"]
+    | Sequence[Literal["eq", "ge", "le", "g", "l"]] = "eq",
+    *,
+    band: int = 1,
+    error_if_no_data: bool = True,
+    num_threads: int = 1,
+) -> PackedMask:
+    """Create a bit-packed mask in memory representing the result of multiple operations on a raster.
+
+    Same as `ops_in_memory`, with 8 pixels per byte: the mask of each window is packed as soon as it is created, so a full
+    mask of `RASTER_DTYPE` is never held in memory.
+
+    Parameters
+    ----------
+    raster_path : str | pathlib.Path | Raster | PackedMask
+        Path to the raster or raster in memory.
+    values : int | float | Sequence[int  |  float]
+        Target numbers of each operation.
+    operation_per_value : Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;] | Sequence[Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;]], optional
+        Operation to perform on each value, by default "eq"
+    band : int, optional
+        Band of geotiff, by default 1
+    error_if_no_data : bool, optional
+        Raise an error if no data is found in the raster, by default True
+    num_threads : int, optional
+        Number of threads that process windows concurrently, by default 1
+
+    Returns
+    -------
+    PackedMask
+        Bit-packed mask in memory.
+
+    Raises
+    ------
+    ValueError
+        If the number of values and operations are not the same or the number of threads is smaller than 1.
+    """
+    values, operation_per_value = _ops_inputs(values, operation_per_value, num_threads)
+
+    with _open(raster_path) as src:
+        bits = np.zeros((src.height, -(-src.width // 8)), dtype=np.uint8)
+        for window, mask in _ops_windows(
+            src, values, operation_per_value, band, num_threads
+        ):
+            # windows that do not start at a multiple of 8 columns share their first byte with the previous window
+            rows, cols = window.toslices()
+            num_bits_shift = cols.start % 8
+            if num_bits_shift:
+                mask = np.pad(mask, ((0, 0), (num_bits_shift, 0)))
+            packed = np.packbits(mask, axis=1)
+            i_byte = cols.start // 8
+            bits[rows, i_byte : i_byte + packed.shape[1]] |= packed
+        out = PackedMask(bits, src.width, src.transform, src.crs)
+
+    if error_if_no_data and not np.any(bits):
+        raise ValueError("Created raster is empty.")
+    return out
+
+
+def _ops_inputs(
+    values: int | float | Sequence[int | float],
+    operation_per_value: Literal["eq", "ge", "le", "g", "l"]
+    | Sequence[Literal["eq", "ge", "le", "g", "l"]],
+    num_threads: int,
+) -> tuple[Sequence[int | float], Sequence[Literal["eq", "ge", "le", "g", "l"]]]:
+    """Check the inputs of `ops` and convert the values and operations to sequences.
+
+    Returns
+    -------
+    tuple[Sequence[int | float], Sequence[Literal["eq", "ge", "le", "g", "l"]]]
+        Values and operation of each value.
+    """
+    # init
     if not isinstance(values, Sequence):
         values = [values]
     if isinstance(operation_per_value, str):
@@ -71,26 +311,236 @@ def ops(
     # checks
     if len(values) != len(operation_per_value):
         raise ValueError("The number of values and operations must be the same.")
+    if num_threads < 1:
+        raise ValueError("num_threads must be equal to or larger than 1.")
+    return values, operation_per_value
+
+
+def _ops_windows(
+    src: "DatasetReader",
+    values: Sequence[int | float],
+    operation_per_value: Sequence[Literal["eq", "ge", "le", "g", "l"]],
+    band: int,
+    num_threads: int,
+) -> Iterator[tuple["Window", npt.NDArray[np.uint8]]]:
+    """Perform the operations of `ops` on a raster window by window.
 
-    # perform operations
-    with rasterio.open(raster_path) as src:
-        data = src.read(band)
+    Returns
+    -------
+    Iterator[tuple[Window, npt.NDArray[np.uint8]]]
+        Window and result of the operations of each window, in the order of the windows.
+    """
+
+    def ops_window(src: "DatasetReader", window: "Window") -> npt.NDArray[np.uint8]:
+        data = src.read(band, window=window)
         mask = np.ones(data.shape, dtype=RASTER_DTYPE)
         for v, operation in zip(values, operation_per_value, strict=False):
             mask &= perform_operation(operation, data, v)
-        out_meta = src.meta.copy()
+        return mask
 
-    # create raster
-    if error_if_no_data and not np.any(mask):
-        raise ValueError("Created raster is empty.")
-    out_meta.update(dtype=RASTER_DTYPE, nodata=None, count=1)
-    with rasterio.open(out_path, "w", **out_meta) as dst:
-        dst.write(mask.astype(RASTER_DTYPE), 1)
-    return out_path
+    windows = list(_windows(src, band))
+    yield from zip(
+        windows, _map_windows(ops_window, src, windows, num_threads), strict=True
+    )
+
+
+@contextlib.contextmanager
+def _open(
+    raster_path: str | pathlib.Path | Raster | PackedMask,
+) -> Iterator["DatasetReader"]:
+    """Open a raster file or a raster in memory.
+
+    Rasters in memory are opened as an uncompressed GeoTIFF in GDAL's in-memory file system, so they may be read like
+    raster files (including by other threads, see `_map_windows`).
+    Packed masks are unpacked.
+
+    Parameters
+    ----------
+    raster_path : str | pathlib.Path | Raster | PackedMask
+        Path to the raster or raster in memory
+
+    Returns
+    -------
+    Iterator[DatasetReader]
+        Dataset of the raster.
+    """
+    import rasterio
+    from rasterio.io import MemoryFile
+
+    if isinstance(raster_path, PackedMask):
+        raster_path = raster_path.unpack()
+    if not isinstance(raster_path, Raster):
+        with rasterio.open(raster_path) as src:
+            yield src
+        return
+
+    height, width = raster_path.data.shape
+    with MemoryFile() as memfile:
+        with memfile.open(
+            driver="GTiff",
+            height=height,
+            width=width,
+            count=1,
+            dtype=raster_path.data.dtype,
+            crs=raster_path.crs,
+            transform=raster_path.transform,
+        ) as dst:
+            dst.write(raster_path.data, 1)
+        with memfile.open() as src:
+            yield src
+
+
+def _windows(src: "DatasetReader", band: int) -> Iterator["Window"]:
+    """Windows that cover a band of a raster, aligned to its blocks.
+
+    Tiled rasters are read block by block. Rasters stored in strips (blocks that span the width of the raster) are read
+    in windows of whole strips of up to `RASTER_WINDOW_NUM_PIXELS` pixels, as single strips are often a single row.
+
+    Parameters
+    ----------
+    src : DatasetReader
+        Raster
+    band : int
+        Band of the raster
+
+    Returns
+    -------
+    Iterator[Window]
+        Windows of the raster.
+    """
+    from rasterio.windows import Window
+
+    block_height, block_width = src.block_shapes[band - 1]
+    if block_width < src.width:
+        for _, window in src.block_windows(band):
+            yield window
+        return
+    num_rows = max(
+        block_height,
+        RASTER_WINDOW_NUM_PIXELS // src.width // block_height * block_height,
+    )
+    for row in range(0, src.height, num_rows):
+        yield Window(0, row, src.width, min(num_rows, src.height - row))
+
+
+def _output_windows(rows: slice, cols: slice) -> Iterator["Window"]:
+    """Windows of up to `RASTER_WINDOW_NUM_PIXELS` pixels that cover a window of an output raster.
+
+    Parameters
+    ----------
+    rows : slice
+        Rows of the window of the output raster
+    cols : slice
+        Columns of the window of the output raster
+
+    Returns
+    -------
+    Iterator[Window]
+        Windows of the output raster.
+    """
+    from rasterio.windows import Window
+
+    num_cols = max(min(cols.stop - cols.start, RASTER_WINDOW_NUM_PIXELS), 1)
+    num_rows = max(RASTER_WINDOW_NUM_PIXELS // num_cols, 1)
+    for row in range(rows.start, rows.stop, num_rows):
+        for col in range(cols.start, cols.stop, num_cols):
+            yield Window(
+                col, row, min(num_cols, cols.stop - col), min(num_rows, rows.stop - row)
+            )
+
+
+def _map_windows(
+    func: Callable[["DatasetReader", "Window"], T],
+    src: "DatasetReader",
+    windows: Sequence["Window"],
+    num_threads: int,
+) -> Iterator[T]:
+    """Apply a function to windows of a raster, concurrently if there are multiple threads.
+
+    The results are in the order of the windows (so outputs do not depend on the number of threads) and at most twice the
+    number of threads windows are in flight, so the memory used is bounded by the number of threads.
+    Datasets are not thread safe: each thread opens the raster once and reads from its own dataset.
+
+    Parameters
+    ----------
+    func : Callable[[DatasetReader, Window], T]
+        Function of a dataset of the raster and a window
+    src : DatasetReader
+        Raster (used as is when there is a single thread)
+    windows : Sequence[Window]
+        Windows of the raster
+    num_threads : int
+        Number of threads
+
+    Returns
+    -------
+    Iterator[T]
+        Result of each window.
+    """
+    if num_threads == 1:
+        for window in windows:
+            yield func(src, window)
+        return
+
+    import rasterio
+
+    local = threading.local()
+    datasets: list[DatasetReader] = []
+    lock = threading.Lock()
+
+    def func_thread(window: "Window") -> T:
+        src_thread = getattr(local, "src", None)
+        if src_thread is None:
+            src_thread = local.src = rasterio.open(src.name)
+            with lock:
+                datasets.append(src_thread)
+        return func(src_thread, window)
+
+    try:
+        with ThreadPoolExecutor(num_threads) as executor:
+            futures: collections.deque[Future[T]] = collections.deque()
+            for window in windows:
+                if len(futures) == 2 * num_threads:
+                    yield futures.popleft().result()
+                futures.append(executor.submit(func_thread, window))
+            while futures:
+                yield futures.popleft().result()
+    finally:
+        for src_thread in datasets:
+            src_thread.close()
+
+
+def _profile(tiled: bool, compress: str | None, bit_packed: bool) -> dict[str, Any]:
+    """Creation options of an output raster.
+
+    Parameters
+    ----------
+    tiled : bool
+        Tile the raster with blocks of `RASTER_BLOCK_SIZE` pixels
+    compress : str | None
+        Compression of the raster
+    bit_packed : bool
+        Store 1 bit per pixel
+
+    Returns
+    -------
+    dict[str, Any]
+        Creation options that are passed to `rasterio.open`.
+    """
+    profile: dict[str, Any] = {}
+    if tiled:
+        profile.update(
+            tiled=True, blockxsize=RASTER_BLOCK_SIZE, blockysize=RASTER_BLOCK_SIZE
+        )
+    if compress is not None:
+        profile["compress"] = compress
+    if bit_packed:
+        profile["nbits"] = 1
+    return profile
 
 
 def coverage_amount(
-    raster_paths: Sequence[str | pathlib.Path],
+    raster_paths: Sequence[str | pathlib.Path | Raster],
     target_values_per_raster: int | Sequence[int],
     *,
     out_path: str | pathlib.Path | None = None,
@@ -98,16 +548,21 @@ def coverage_amount(
     | Sequence[Literal["eq", "ge", "le", "g", "l"]] = "eq",
     delta_x: float | None = None,
     delta_y: float | None = None,
-    resampling_method: Resampling = Resampling.nearest,
+    resampling_method: "Resampling | None" = None,
     band_per_raster: int | Sequence[int] = 1,
     overwrite_file: bool = True,
+    num_threads: int = 1,
 ) -> tuple[pathlib.Path, list[int]]:
     """Create a raster representing how many times each pixel is covered by the target values from all given rasters.
 
+    Each raster is resampled only into the window of the output that it covers, so the time and memory scale with the
+    sizes of the rasters rather than with the size of the output. Pixels outside of a raster, or where it has no data, are
+    not covered by it.
+
     Parameters
     ----------
-    raster_paths : Sequence[str  |  pathlib.Path]
-        Paths to rasters.
+    raster_paths : Sequence[str  |  pathlib.Path  |  Raster]
+        Paths to rasters or rasters in memory.
     target_values_per_raster : int | Sequence[int]
         Values that represent coverage in each raster. If a single int is given, it is assumed that all rasters have the same target values. If a list of ints is given, it is assumed that each raster has its own target values. If a list of lists of ints is given, it is assumed that each raster has multiple target values.
     out_path : str | pathlib.Path, optional
@@ -118,12 +573,14 @@ def coverage_amount(
         Pixel size along x axis, by default None
     delta_y : float | None, optional
         Pixel size along y axis, by default None
-    resampling_method : Resampling, optional
-        Resampling method that is passed to `reproject` method, by default Resampling.nearest
+    resampling_method : Resampling | None, optional
+        Resampling method that is passed to `reproject` method, by default None (Resampling.nearest)
     band_per_raster : int | Sequence[int], optional
         The band of each raster to be read, by default 1
     overwrite_file : bool, optional
         Overwrite the output file if True else raise an error if the file exists, by default True
+    num_threads : int, optional
+        Number of threads that resample windows of each raster concurrently, by default 1
 
     Returns
     -------
@@ -135,7 +592,8 @@ def coverage_amount(
     FileExistsError
         If the output file already exists and `overwrite_file` is False.
     ValueError
-        If the number of rasters, target values, operations and bands are not the same.
+        If the number of rasters, target values, operations and bands are not the same or the number of threads is
+        smaller than 1.
     """
 
     # init
@@ -147,6 +605,115 @@ def coverage_amount(
         out_path.unlink()
     elif out_path.exists():
         raise FileExistsError(f"File {out_path} already exists.")
+    coverage_matrix, tf = _coverage_amount(
+        raster_paths,
+        target_values_per_raster,
+        operation_per_raster,
+        delta_x,
+        delta_y,
+        resampling_method,
+        band_per_raster,
+        num_threads,
+    )
+
+    import rasterio
+
+    out_meta = {
+        "driver": "GTiff",
+        "height": coverage_matrix.shape[0],
+        "width": coverage_matrix.shape[1],
+        "count": 1,
+        "dtype": "int16",
+        "crs": "EPSG:4326",
+        "transform": tf,
+    }
+    with rasterio.open(out_path, "w", **out_meta) as out_raster:
+        out_raster.write(coverage_matrix, 1)
+
+    return out_path, np.unique(coverage_matrix).ravel().tolist()
+
+
+def coverage_amount_in_memory(
+    raster_paths: Sequence[str | pathlib.Path | Raster],
+    target_values_per_raster: int | Sequence[int],
+    *,
+    operation_per_raster: Literal["eq", "ge", "le", "g", "l"]
+    | Sequence[Literal["eq", "ge", "le", "g", "l"]] = "eq",
+    delta_x: float | None = None,
+    delta_y: float | None = None,
+    resampling_method: "Resampling | None" = None,
+    band_per_raster: int | Sequence[int] = 1,
+    num_threads: int = 1,
+) -> tuple[Raster, list[int]]:
+    """Create a raster in memory representing how many times each pixel is covered by the target values from all given rasters.
+
+    Same as `coverage_amount`, without writing the result to a file.
+
+    Parameters
+    ----------
+    raster_paths : Sequence[str  |  pathlib.Path  |  Raster]
+        Paths to rasters or rasters in memory.
+    target_values_per_raster : int | Sequence[int]
+        Values that represent coverage in each raster (see `coverage_amount`).
+    operation_per_value : Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;] | Sequence[Literal[&quot;eq&quot;, &quot;ge&quot;, &quot;le&quot;, &quot;g&quot;, &quot;l&quot;]], optional
+        Operation to perform on each value, by default "eq"
+    delta_x : float | None, optional
+        Pixel size along x axis, by default None
+    delta_y : float | None, optional
+        Pixel size along y axis, by default None
+    resampling_method : Resampling | None, optional
+        Resampling method that is passed to `reproject` method, by default None (Resampling.nearest)
+    band_per_raster : int | Sequence[int], optional
+        The band of each raster to be read, by default 1
+    num_threads : int, optional
+        Number of threads that resample windows of each raster concurrently, by default 1
+
+    Returns
+    -------
+    tuple[Raster, list[int]]
+        Raster in memory (of type uint16) and the unique coverage amounts.
+
+    Raises
+    ------
+    ValueError
+        If the number of rasters, target values, operations and bands are not the same or the number of threads is
+        smaller than 1.
+    """
+    coverage_matrix, tf = _coverage_amount(
+        raster_paths,
+        target_values_per_raster,
+        operation_per_raster,
+        delta_x,
+        delta_y,
+        resampling_method,
+        band_per_raster,
+        num_threads,
+    )
+    return Raster(coverage_matrix, tf, "EPSG:4326"), np.unique(
+        coverage_matrix
+    ).ravel().tolist()
+
+
+def _coverage_amount(
+    raster_paths: Sequence[str | pathlib.Path | Raster],
+    target_values_per_raster: int | Sequence[int],
+    operation_per_raster: Literal["eq", "ge", "le", "g", "l"]
+    | Sequence[Literal["eq", "ge", "le", "g", "l"]],
+    delta_x: float | None,
+    delta_y: float | None,
+    resampling_method: "Resampling | None",
+    band_per_raster: int | Sequence[int],
+    num_threads: int,
+) -> tuple[npt.NDArray[np.uint16], "Affine"]:
+    """Count how many times each pixel is covered by the target values from all given rasters.
+
+    See `coverage_amount` for a description of the parameters.
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.uint16], Affine]
+        Coverage amount of each pixel and the affine transform of the output.
+    """
     if isinstance(target_values_per_raster, int):
         target_values_per_raster = [target_values_per_raster] * len(raster_paths)
     if isinstance(operation_per_raster, str):
@@ -164,11 +731,20 @@ def coverage_amount(
         raise ValueError(
             "The number of rasters, target values, operations and bands must be the same."
         )
+    if num_threads < 1:
+        raise ValueError("num_threads must be equal to or larger than 1.")
+
+    import rasterio
+    from rasterio import transform
+    from rasterio.warp import Resampling, reproject
+
+    if resampling_method is None:
+        resampling_method = Resampling.nearest
 
     # define extent
     min_x, min_y, max_x, max_y = None, None, None, None
     for f in raster_paths:
-        with rasterio.open(f) as src:
+        with _open(f) as src:
             if delta_x is None:
                 delta_x = src.transform.a
             else:
@@ -203,33 +779,55 @@ def coverage_amount(
         target_values_per_raster,
         band_per_raster,
         operation_per_raster,
-        strict=False,
+        strict=True,
     ):
-        with rasterio.open(f) as src:
-            resampled_data = np.zeros(coverage_matrix.shape, dtype=src.read(band).dtype)
-            reproject(
-                source=rasterio.band(src, band),
-                destination=resampled_data,
-                src_transform=src.transform,
-                src_crs=src.crs,
-                dst_transform=tf,
-                dst_crs=src.crs,
-                resampling=resampling_method,
+        with _open(f) as src:
+            # window of the output that the raster covers
+            col_start, row_start = ~tf * (src.bounds.left, src.bounds.top)
+            col_end, row_end = ~tf * (src.bounds.right, src.bounds.bottom)
+            rows = slice(
+                max(int(np.floor(row_start + RASTER_PIXEL_TOLERANCE)), 0),
+                min(int(np.ceil(row_end - RASTER_PIXEL_TOLERANCE)), height),
             )
-            coverage_matrix += perform_operation(
-                operation, resampled_data, target_value
+            cols = slice(
+                max(int(np.floor(col_start + RASTER_PIXEL_TOLERANCE)), 0),
+                min(int(np.ceil(col_end - RASTER_PIXEL_TOLERANCE)), width),
             )
 
-    out_meta = {
-        "driver": "GTiff",
-        "height": height,
-        "width": width,
-        "count": 1,
-        "dtype": "int16",
-        "crs": "EPSG:4326",
-        "transform": tf,
-    }
-    with rasterio.open(out_path, "w", **out_meta) as out_raster:
-        out_raster.write(coverage_matrix, 1)
+            def coverage_window(
+                src_window: "DatasetReader",
+                window: "Window",
+                target_value: int = target_value,
+                band: int = band,
+                operation: Literal["eq", "ge", "le", "g", "l"] = operation,
+            ) -> npt.NDArray[np.bool_]:
+                # the second band is an alpha band that is 0 where the raster has no data (e.g. the fringe of the window)
+                resampled_data = np.zeros(
+                    (2, window.height, window.width), dtype=src_window.dtypes[band - 1]
+                )
+                reproject(
+                    source=rasterio.band(src_window, band),
+                    destination=resampled_data,
+                    src_transform=src_window.transform,
+                    src_crs=src_window.crs,
+                    dst_transform=tf
+                    * transform.Affine.translation(window.col_off, window.row_off),
+                    dst_crs=src_window.crs,
+                    dst_alpha=2,
+                    resampling=resampling_method,
+                )
+                is_covered = perform_operation(
+                    operation, resampled_data[0], target_value
+                )
+                is_covered &= resampled_data[1] != 0
+                return is_covered
 
-    return out_path, np.unique(coverage_matrix).ravel().tolist()
+            # windows of the output are resampled concurrently and added in order
+            windows = list(_output_windows(rows, cols))
+            for window, is_covered in zip(
+                windows,
+                _map_windows(coverage_window, src, windows, num_threads),
+                strict=True,
+            ):
+                coverage_matrix[window.toslices()] += is_covered
+    return coverage_matrix, tf
@@ -0,0 +1,692 @@
+import functools
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+from transforms84.helpers import DDM2RRM, RRM2DDM, wrap
+from transforms84.systems import WGS84
+from transforms84.transforms import (
+    AER2ENU,
+    ENU2ECEF,
+    ECEF2geodetic,
+)
+
+from .definitions import (
+    ARC_TEMPLATE_CACHE_SIZE,
+    SENSOR_AZIMUTH_ARC,
+    SENSOR_CORNER,
+    SENSOR_ELEVATION_ARC,
+)
+from .errors import DataTypeError, MismatchedInputsError, NumDimensionsError, ShapeError
+
+# Each sensor has up to 12 polylines, in this order:
+#   - 4 lines from the sensor to the corners of the FOV
+#   - 4 arcs at the minimum range
+#   - 4 arcs at the maximum range
+# The arcs of each range are: elevation arcs at the minimum/maximum azimuths, followed by azimuth arcs at the
+# minimum/maximum elevations.
+_KIND_PER_SLOT = np.array(
+    [SENSOR_CORNER] * 4
+    + [SENSOR_ELEVATION_ARC] * 2
+    + [SENSOR_AZIMUTH_ARC] * 2
+    + [SENSOR_ELEVATION_ARC] * 2
+    + [SENSOR_AZIMUTH_ARC] * 2
+)
+_SIGN_AZ_PER_CORNER = np.array([-1, 1, 1, -1])
+_SIGN_EL_PER_CORNER = np.array([-1, -1, 1, 1])
+
+
+FOOTPRINT_DTYPE = np.dtype(
+    [
+        ("sensor", np.int64),
+        ("polyline", np.int64),
+        ("kind", np.uint8),
+        ("point", np.int64),
+        ("lat", np.float64),
+        ("long", np.float64),
+        ("alt", np.float64),
+    ]
+)
+
+
+def footprint(
+    ddm_LLA: Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_az_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_el_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_az_FOV: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_el_FOV: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    m_distance_max: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    m_distance_min: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer]
+    | None = None,
+    *,
+    subdivisions: int | Sequence[int] = 64,
+    show_minimum_range_polyline: bool = True,
+    max_ellipsoid_angle: float | int = 100.0,
+    m_chord_error_max: float | int | None = None,
+) -> npt.NDArray[np.void]:
+    """Calculate the outline of sensor(s) without creating CZML3 packets.
+
+    The outline is identical to the polylines created by `packets.sensor`, with one row per point of each polyline.
+    The fields of the output array (see `FOOTPRINT_DTYPE`) are:
+        - sensor: index of the sensor
+        - polyline: index of the polyline of the sensor, in the order of the packets of `packets.sensor`
+        - kind: `SENSOR_CORNER`, `SENSOR_ELEVATION_ARC` or `SENSOR_AZIMUTH_ARC` (see `czml3_ext.definitions`)
+        - point: index of the point in the polyline
+        - lat, long, alt: location of the point [deg, deg, m]
+
+    Lines to the corners of the FOV start at the location of the sensor.
+
+    Parameters
+    ----------
+    ddm_LLA : Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Location of sensor(s) in LLA [deg, deg, m] of shape (3, 1) for one sensor of (n, 3, 1) for n sensors
+    deg_az_broadside : int | float | np.floating | np.integer | Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Azimuth of sensor(s) [deg]
+    deg_el_broadside : int | float | np.floating | np.integer | Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Elevation of sensor(s) [deg]
+    deg_az_FOV : int | float | np.floating | np.integer | Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Azimuth FOV of sensor(s) [deg]
+    deg_el_FOV : int | float | np.floating | np.integer | Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Elevation FOV of sensor(s) [deg]
+    m_distance_max : int | float | np.floating | np.integer | Sequence[int | float | np.integer | np.floating] | npt.NDArray[np.floating | np.integer]
+        Maximum range of sensor(s) [m]
+    m_distance_min : int | float | np.floating | np.integer | Sequence[int | float | np.floating | np.integer] | npt.NDArray[np.integer | np.floating] | None
+        Minimum range of sensor(s) [m], by default None
+    subdivisions : int, Sequence[int]
+        The number of samples per azimuth and elevation arc, determining the granularity of the curvature, by default 64
+    show_minimum_range_polyline : bool
+        Include the lines to the minimum range of sensors that use an ellipsoid, by default True
+    max_ellipsoid_angle : float, int
+        The maximum angle of a sensor that uses an ellipsoid - any number greater than this will create the azimuth and elevation arcs, by default 100.0
+    m_chord_error_max : float | int | None
+        The maximum distance [m] between each arc and its polyline, by default None (use subdivisions).
+        If given then subdivisions is ignored and the number of samples is chosen per arc (see `packets.sensor`)
+
+    Returns
+    -------
+    npt.NDArray[np.void]
+        Structured array of dtype `FOOTPRINT_DTYPE` of all points of all sensors.
+    """
+    (
+        ddm_LLA,
+        deg_az_broadside,
+        deg_el_broadside,
+        deg_az_FOV,
+        deg_el_FOV,
+        m_distance_max,
+        m_distance_min,
+        subdivisions_per_sensor,
+    ) = _sensor_inputs(
+        ddm_LLA,
+        deg_az_broadside,
+        deg_el_broadside,
+        deg_az_FOV,
+        deg_el_FOV,
+        m_distance_max,
+        m_distance_min,
+        subdivisions,
+        m_chord_error_max,
+    )
+    ddm_LLA_outline, i_sensor_per_polyline, kind_per_polyline, i_start_per_polyline = (
+        _outline(
+            ddm_LLA,
+            deg_az_broadside,
+            deg_el_broadside,
+            deg_az_FOV,
+            deg_el_FOV,
+            m_distance_max,
+            m_distance_min,
+            subdivisions_per_sensor,
+            show_minimum_range_polyline,
+            max_ellipsoid_angle,
+        )
+    )
+
+    # index of each polyline within its sensor
+    i_first_polyline_per_sensor = np.searchsorted(
+        i_sensor_per_polyline, np.arange(ddm_LLA.shape[0])
+    )
+    i_polyline = (
+        np.arange(i_sensor_per_polyline.size)
+        - i_first_polyline_per_sensor[i_sensor_per_polyline]
+    )
+
+    num_points = np.diff(i_start_per_polyline)
+    i_polyline_per_point = np.repeat(np.arange(num_points.size), num_points)
+    out = np.empty(ddm_LLA_outline.shape[0], dtype=FOOTPRINT_DTYPE)
+    out["sensor"] = i_sensor_per_polyline[i_polyline_per_point]
+    out["polyline"] = i_polyline[i_polyline_per_point]
+    out["kind"] = kind_per_polyline[i_polyline_per_point]
+    out["point"] = (
+        np.arange(ddm_LLA_outline.shape[0]) - i_start_per_polyline[i_polyline_per_point]
+    )
+    out["lat"] = ddm_LLA_outline[:, 0, 0]
+    out["long"] = ddm_LLA_outline[:, 1, 0]
+    out["alt"] = ddm_LLA_outline[:, 2, 0]
+    return out
+
+
+def _sensor_inputs(
+    ddm_LLA: Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_az_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_el_broadside: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_az_FOV: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    deg_el_FOV: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    m_distance_max: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer],
+    m_distance_min: int
+    | float
+    | np.floating
+    | np.integer
+    | Sequence[int | float | np.integer | np.floating]
+    | npt.NDArray[np.floating | np.integer]
+    | None,
+    subdivisions: int | Sequence[int],
+    m_chord_error_max: float | int | None = None,
+) -> tuple[
+    npt.NDArray[np.floating | np.integer],
+    npt.NDArray[np.floating | np.integer],
+    npt.NDArray[np.floating | np.integer],
+    npt.NDArray[np.floating | np.integer],
+    npt.NDArray[np.floating | np.integer],
+    npt.NDArray[np.floating | np.integer],
+    npt.NDArray[np.floating | np.integer],
+    npt.NDArray[np.int64],
+]:
+    """Check the inputs of a sensor and convert them to arrays of one value per sensor.
+
+    See `packets.sensor` for a description of the parameters.
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.floating | np.integer], npt.NDArray[np.floating | np.integer], npt.NDArray[np.floating | np.integer], npt.NDArray[np.floating | np.integer], npt.NDArray[np.floating | np.integer], npt.NDArray[np.floating | np.integer], npt.NDArray[np.floating | np.integer], npt.NDArray[np.int64]]
+        Location of shape (n, 3, 1), azimuth, elevation, azimuth FOV, elevation FOV, maximum range, minimum range and subdivisions of each arc of shape (n, 8) of all sensors.
+
+    Raises
+    ------
+    ShapeError
+        Point(s) are not of shape (3, 1) or (n, 3, 1)
+    NumDimensionsError
+        Point(s) do not have two or three dimensions
+    DataTypeError
+        Point(s) are not of a floating point data type
+    TypeError
+        An input is not an int, float, sequence or numpy array
+    MismatchedInputsError
+        Inputs do not have the same length
+    ValueError
+        The maximum chord error is not positive
+    """
+    if isinstance(ddm_LLA, Sequence):
+        ddm_LLA = np.array(ddm_LLA).reshape((-1, 3, 1))
+    if ddm_LLA.ndim == 2 and ddm_LLA.shape != (3, 1):
+        raise ShapeError("A single point must be of shape (3, 1)")
+    elif ddm_LLA.ndim == 3 and ddm_LLA.shape[1:] != (3, 1):
+        raise ShapeError("Multiple points must be of shape (n, 3, 1)")
+    elif not (ddm_LLA.ndim == 2 or ddm_LLA.ndim == 3):
+        raise NumDimensionsError(
+            "Point(s) must either have two dimensions with shape (3, 1) or (n, 3, 1)"
+        )
+
+    # make all inputs into arrays
+    if ddm_LLA.ndim == 2:
+        ddm_LLA = ddm_LLA[None, :]
+    if not isinstance(ddm_LLA[0, 0, 0], np.floating):
+        raise DataTypeError("Point(s) array must have a floating point data type")
+    if np.isscalar(deg_az_broadside):
+        deg_az_broadside = np.array([deg_az_broadside])
+    elif isinstance(deg_az_broadside, Sequence):
+        deg_az_broadside = np.array(deg_az_broadside)
+    elif not isinstance(deg_az_broadside, np.ndarray):
+        raise TypeError(
+            "deg_az_broadside must be an int, float, sequence or numpy array"
+        )
+    if np.isscalar(deg_el_broadside):
+        deg_el_broadside = np.array([deg_el_broadside])
+    elif isinstance(deg_el_broadside, Sequence):
+        deg_el_broadside = np.array(deg_el_broadside)
+    elif not isinstance(deg_el_broadside, np.ndarray):
+        raise TypeError(
+            "deg_el_broadside must be an int, float, sequence or numpy array"
+        )
+    if np.isscalar(deg_az_FOV):
+        deg_az_FOV = np.array([deg_az_FOV])
+    elif isinstance(deg_az_FOV, Sequence):
+        deg_az_FOV = np.array(deg_az_FOV)
+    elif not isinstance(deg_az_FOV, np.ndarray):
+        raise TypeError("deg_az_FOV must be an int, float, sequence or numpy array")
+    if np.isscalar(deg_el_FOV):
+        deg_el_FOV = np.array([deg_el_FOV])
+    elif isinstance(deg_el_FOV, Sequence):
+        deg_el_FOV = np.array(deg_el_FOV)
+    elif not isinstance(deg_el_FOV, np.ndarray):
+        raise TypeError("deg_el_FOV must be an int, float, sequence or numpy array")
+    if np.isscalar(m_distance_max):
+        m_distance_max = np.array([m_distance_max])
+    elif isinstance(m_distance_max, Sequence):
+        m_distance_max = np.array(m_distance_max)
+    elif not isinstance(m_distance_max, np.ndarray):
+        raise TypeError("m_distance_max must be an int, float, sequence or numpy array")
+    if m_distance_min is None:
+        m_distance_min = np.zeros_like(m_distance_max)
+    elif np.isscalar(m_distance_min):
+        m_distance_min = np.array([m_distance_min])
+    elif isinstance(m_distance_min, Sequence):
+        m_distance_min = np.array(m_distance_min)
+    elif not isinstance(m_distance_min, np.ndarray):
+        raise TypeError("m_distance_min must be an int, float, sequence or numpy array")
+    if not isinstance(subdivisions, Sequence):
+        subdivisions = [subdivisions for _ in range(ddm_LLA.shape[0])]
+    if not (
+        ddm_LLA.shape[0]
+        == deg_az_broadside.size
+        == deg_el_broadside.size
+        == deg_az_FOV.size
+        == deg_el_FOV.size
+        == m_distance_max.size
+        == m_distance_min.size
+        == len(subdivisions)
+    ):
+        raise MismatchedInputsError("All inputs must have same length")
+    if m_chord_error_max is not None and m_chord_error_max <= 0:
+        raise ValueError("m_chord_error_max must be larger than 0.")
+
+    return (
+        ddm_LLA,
+        deg_az_broadside,
+        deg_el_broadside,
+        deg_az_FOV,
+        deg_el_FOV,
+        m_distance_max,
+        m_distance_min,
+        _arc_subdivisions(
+            deg_el_broadside,
+            deg_az_FOV,
+            deg_el_FOV,
+            m_distance_max,
+            m_distance_min,
+            np.asarray(subdivisions, dtype=np.int64),
+            m_chord_error_max,
+        ),
+    )
+
+
+def _arc_subdivisions(
+    deg_el_broadside: npt.NDArray[np.floating | np.integer],
+    deg_az_FOV: npt.NDArray[np.floating | np.integer],
+    deg_el_FOV: npt.NDArray[np.floating | np.integer],
+    m_distance_max: npt.NDArray[np.floating | np.integer],
+    m_distance_min: npt.NDArray[np.floating | np.integer],
+    subdivisions: npt.NDArray[np.integer],
+    m_chord_error_max: float | int | None,
+) -> npt.NDArray[np.int64]:
+    """The number of samples of each of the eight arcs of sensors.
+
+    Without a maximum chord error all arcs of a sensor have its number of subdivisions.
+    Otherwise, each arc gets the fewest samples for which the distance between the arc and the straight line between
+    consecutive samples (the sagitta) is at most the maximum chord error. The elevation arcs are circles with the radius of
+    the range and the azimuth arcs are circles with the radius of the range times the cosine of their elevation.
+
+    Parameters
+    ----------
+    deg_el_broadside : npt.NDArray[np.floating | np.integer]
+        Elevation of sensors [deg]
+    deg_az_FOV : npt.NDArray[np.floating | np.integer]
+        Azimuth FOV of sensors [deg]
+    deg_el_FOV : npt.NDArray[np.floating | np.integer]
+        Elevation FOV of sensors [deg]
+    m_distance_max : npt.NDArray[np.floating | np.integer]
+        Maximum range of sensors [m]
+    m_distance_min : npt.NDArray[np.floating | np.integer]
+        Minimum range of sensors [m]
+    subdivisions : npt.NDArray[np.integer]
+        The number of samples per arc of each sensor
+    m_chord_error_max : float | int | None
+        The maximum distance between each arc and its polyline [m]
+
+    Returns
+    -------
+    npt.NDArray[np.int64]
+        The number of samples of shape (n, 8) of the arcs at the minimum range followed by the arcs at the maximum range,
+        in the order of `_KIND_PER_SLOT`
+    """
+    num_sensors = subdivisions.size
+    if m_chord_error_max is None:
+        return np.repeat(subdivisions.reshape((-1, 1)), 8, axis=1)
+
+    # radius and angle of each arc
+    m_distance = np.stack((m_distance_min, m_distance_max), axis=1)
+    m_radius = np.empty((num_sensors, 2, 4), dtype=np.float64)
+    m_radius[:, :, :2] = m_distance[:, :, None]
+    m_radius[:, :, 2] = m_distance * np.abs(
+        np.cos(np.deg2rad(deg_el_broadside - deg_el_FOV / 2))
+    ).reshape((-1, 1))
+    m_radius[:, :, 3] = m_distance * np.abs(
+        np.cos(np.deg2rad(deg_el_broadside + deg_el_FOV / 2))
+    ).reshape((-1, 1))
+    rad_arc = np.empty((num_sensors, 2, 4), dtype=np.float64)
+    rad_arc[:, :, :2] = np.deg2rad(deg_el_FOV).reshape((-1, 1, 1))
+    rad_arc[:, :, 2:] = np.deg2rad(deg_az_FOV).reshape((-1, 1, 1))
+
+    # the largest angle of a segment with a sagitta of the maximum chord error is 4 * arcsin(sqrt(e / 2r))
+    ratio = np.divide(
+        m_chord_error_max,
+        2 * m_radius,
+        out=np.ones_like(m_radius),
+        where=m_radius > 0,
+    )
+    rad_segment_max = 4 * np.arcsin(np.sqrt(np.minimum(ratio, 1)))
+    num_segments: npt.NDArray[np.float64] = np.maximum(
+        np.ceil(rad_arc / rad_segment_max), 1
+    )
+    return (num_segments.astype(np.int64) + 1).reshape((num_sensors, 8))
+
+
+def _outline(
+    ddm_LLA: npt.NDArray[np.floating | np.integer],
+    deg_az_broadside: npt.NDArray[np.floating | np.integer],
+    deg_el_broadside: npt.NDArray[np.floating | np.integer],
+    deg_az_FOV: npt.NDArray[np.floating | np.integer],
+    deg_el_FOV: npt.NDArray[np.floating | np.integer],
+    m_distance_max: npt.NDArray[np.floating | np.integer],
+    m_distance_min: npt.NDArray[np.floating | np.integer],
+    subdivisions: npt.NDArray[np.integer],
+    show_minimum_range_polyline: bool,
+    max_ellipsoid_angle: float | int,
+) -> tuple[
+    npt.NDArray[np.float64],
+    npt.NDArray[np.int64],
+    npt.NDArray[np.int64],
+    npt.NDArray[np.int64],
+]:
+    """Calculate the outline polylines of all sensors.
+
+    All points of all polylines of all sensors are transformed in a single pass.
+    Polylines are ordered by sensor and, within each sensor, by the order in which `packets.sensor` outputs them.
+
+    Parameters
+    ----------
+    ddm_LLA : npt.NDArray[np.floating]
+        Location of sensors in LLA [deg, deg, m] of shape (n, 3, 1)
+    deg_az_broadside : npt.NDArray[np.floating | np.integer]
+        Azimuth of sensors [deg]
+    deg_el_broadside : npt.NDArray[np.floating | np.integer]
+        Elevation of sensors [deg]
+    deg_az_FOV : npt.NDArray[np.floating | np.integer]
+        Azimuth FOV of sensors [deg]
+    deg_el_FOV : npt.NDArray[np.floating | np.integer]
+        Elevation FOV of sensors [deg]
+    m_distance_max : npt.NDArray[np.floating | np.integer]
+        Maximum range of sensors [m]
+    m_distance_min : npt.NDArray[np.floating | np.integer]
+        Minimum range of sensors [m]
+    subdivisions : npt.NDArray[np.integer]
+        The number of samples of each arc of each sensor of shape (n, 8) (see `_arc_subdivisions`)
+    show_minimum_range_polyline : bool
+        Create the lines to the minimum range of sensors that use an ellipsoid
+    max_ellipsoid_angle : float | int
+        The maximum azimuth FOV of sensors that use an ellipsoid
+
+    Returns
+    -------
+    tuple[npt.NDArray[np.float64], npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]
+        Points of all polylines in LLA [deg, deg, m] of shape (p, 3, 1), sensor index of each polyline, kind of each polyline
+        and the start index of each polyline in the points array (with a final entry equal to p).
+    """
+    num_sensors = ddm_LLA.shape[0]
+    rrm_LLA = DDM2RRM(ddm_LLA)
+    rad_az_broadside = np.deg2rad(deg_az_broadside)
+    rad_el_broadside = np.deg2rad(deg_el_broadside)
+    rad_az_FOV = np.deg2rad(deg_az_FOV)
+    rad_el_FOV = np.deg2rad(deg_el_FOV)
+
+    # polylines that exist per sensor
+    use_polyline = max_ellipsoid_angle <= deg_az_FOV
+    exists = np.zeros((num_sensors, _KIND_PER_SLOT.size), dtype=np.bool_)
+    exists[:, :4] = (
+        use_polyline | ((m_distance_min != 0) & show_minimum_range_polyline)
+    )[:, None]
+    exists[:, 4:8] = (use_polyline & (m_distance_min != 0))[:, None]
+    exists[:, 8:] = (use_polyline & (m_distance_max != 0))[:, None]
+    i_sensor_per_polyline, i_slot_per_polyline = np.nonzero(exists)
+    kind_per_polyline = _KIND_PER_SLOT[i_slot_per_polyline]
+    is_corner = kind_per_polyline == SENSOR_CORNER
+
+    # polyline parameters
+    m_distance_per_slot = np.empty(exists.shape, dtype=np.float64)
+    m_distance_per_slot[:, :4] = np.where(use_polyline, m_distance_max, m_distance_min)[
+        :, None
+    ]
+    m_distance_per_slot[:, 4:8] = m_distance_min[:, None]
+    m_distance_per_slot[:, 8:] = m_distance_max[:, None]
+    m_distance = m_distance_per_slot[i_sensor_per_polyline, i_slot_per_polyline]
+    num_points = np.where(
+        is_corner,
+        2,
+        subdivisions[i_sensor_per_polyline, np.maximum(i_slot_per_polyline - 4, 0)],
+    ).astype(np.int64)
+    i_start_per_polyline = np.zeros(num_points.size + 1, dtype=np.int64)
+    np.cumsum(num_points, out=i_start_per_polyline[1:])
+
+    # index of every point within its polyline
+    i_polyline_per_point = np.repeat(np.arange(num_points.size), num_points)
+    i_point = (
+        np.arange(i_start_per_polyline[-1])
+        - i_start_per_polyline[:-1][i_polyline_per_point]
+    )
+    is_corner_point = is_corner[i_polyline_per_point]
+    is_origin = is_corner_point & (i_point == 0)
+    rad_az = np.empty(i_start_per_polyline[-1], dtype=np.float64)
+    rad_el = np.empty(i_start_per_polyline[-1], dtype=np.float64)
+
+    # corners (the first point of a corner line is the sensor itself)
+    is_corner_end = is_corner_point & ~is_origin
+    i_polyline = i_polyline_per_point[is_corner_end]
+    i_sensor = i_sensor_per_polyline[i_polyline]
+    i_corner = i_slot_per_polyline[i_polyline]
+    rad_az[is_corner_end] = (
+        rad_az_broadside[i_sensor]
+        + _SIGN_AZ_PER_CORNER[i_corner] * rad_az_FOV[i_sensor] / 2
+    )
+    rad_el[is_corner_end] = (
+        rad_el_broadside[i_sensor]
+        + _SIGN_EL_PER_CORNER[i_corner] * rad_el_FOV[i_sensor] / 2
+    )
+
+    # arcs are the arc template of the FOV and subdivisions of the sensor at each range offset by the broadside
+    i_sensor_per_range, i_range = np.nonzero(exists[:, 4::4])
+    deg_FOV_subdivisions = np.column_stack(
+        (
+            deg_az_FOV[i_sensor_per_range],
+            deg_el_FOV[i_sensor_per_range],
+            subdivisions.reshape((-1, 2, 4))[i_sensor_per_range, i_range],
+        )
+    ).astype(np.float64)
+    deg_FOV_subdivisions_unique, i_template_per_range = np.unique(
+        deg_FOV_subdivisions, axis=0, return_inverse=True
+    )
+    i_template_per_sensor_range = np.full((num_sensors, 2), -1, dtype=np.int64)
+    i_template_per_sensor_range[i_sensor_per_range, i_range] = (
+        i_template_per_range.ravel()
+    )
+    rad_az_el_templates = [
+        _arc_template(
+            float(deg_az),
+            float(deg_el),
+            tuple(int(num_subdivisions) for num_subdivisions in subdivisions_arcs),
+        )
+        for deg_az, deg_el, *subdivisions_arcs in deg_FOV_subdivisions_unique
+    ]
+    i_start_per_template = np.zeros(len(rad_az_el_templates), dtype=np.int64)
+    if len(rad_az_el_templates) > 0:
+        np.cumsum(
+            [t.shape[1] for t in rad_az_el_templates[:-1]],
+            out=i_start_per_template[1:],
+        )
+        rad_az_el_template = np.concatenate(rad_az_el_templates, axis=1)
+    else:
+        rad_az_el_template = np.empty((2, 0), dtype=np.float64)
+    subdivisions_per_range = subdivisions.reshape((-1, 2, 4))
+    i_start_per_arc = (
+        np.cumsum(subdivisions_per_range, axis=2) - subdivisions_per_range
+    ).reshape((-1, 8))
+    is_arc = ~is_corner_point
+    i_polyline = i_polyline_per_point[is_arc]
+    i_sensor = i_sensor_per_polyline[i_polyline]
+    i_arc = i_slot_per_polyline[i_polyline] - 4
+    i_template = (
+        i_start_per_template[i_template_per_sensor_range[i_sensor, i_arc // 4]]
+        + i_start_per_arc[i_sensor, i_arc]
+        + i_point[is_arc]
+    )
+    rad_az[is_arc] = (
+        rad_az_broadside[i_sensor] + rad_az_el_template[0, i_template]
+    ) % (2 * np.pi)
+    rad_el[is_arc] = wrap(
+        rad_el_broadside[i_sensor] + rad_az_el_template[1, i_template],
+        -np.pi,
+        np.pi,
+    )
+
+    # transform all points
+    rrm_AER = np.empty((np.count_nonzero(~is_origin), 3, 1), dtype=np.float64)
+    rrm_AER[:, 0, 0] = rad_az[~is_origin]
+    rrm_AER[:, 1, 0] = rad_el[~is_origin]
+    rrm_AER[:, 2, 0] = m_distance[i_polyline_per_point[~is_origin]]
+    ddm_LLA_points = np.empty((i_start_per_polyline[-1], 3, 1), dtype=np.float64)
+    ddm_LLA_points[is_origin] = ddm_LLA[i_sensor_per_polyline[is_corner]]
+    ddm_LLA_points[~is_origin] = RRM2DDM(
+        ECEF2geodetic(
+            ENU2ECEF(
+                rrm_LLA[i_sensor_per_polyline[i_polyline_per_point[~is_origin]]],
+                AER2ENU(rrm_AER),
+                WGS84.a,
+                WGS84.b,
+            ),
+            WGS84.a,
+            WGS84.b,
+        )
+    )
+    return (
+        ddm_LLA_points,
+        i_sensor_per_polyline.astype(np.int64),
+        kind_per_polyline.astype(np.int64),
+        i_start_per_polyline,
+    )
+
+
+def arc_template_cache_info() -> functools._CacheInfo:
+    """Statistics of the cache of arc templates.
+
+    Sensors with the same azimuth FOV, elevation FOV and subdivisions share the same arc template.
+
+    Returns
+    -------
+    functools._CacheInfo
+        Hits, misses, maximum size and current size of the cache.
+    """
+    return _arc_template.cache_info()
+
+
+def clear_arc_template_cache() -> None:
+    """Clear the cache of arc templates and its statistics."""
+    _arc_template.cache_clear()
+
+
+@functools.lru_cache(maxsize=ARC_TEMPLATE_CACHE_SIZE)
+def _arc_template(
+    deg_az_FOV: float, deg_el_FOV: float, subdivisions: tuple[int, ...]
+) -> npt.NDArray[np.float64]:
+    """Azimuth and elevation offsets from the broadside of the four arcs of a sensor at one range.
+
+    The arcs are in the order of `_KIND_PER_SLOT`: elevation arcs at the minimum/maximum azimuths followed by azimuth
+    arcs at the minimum/maximum elevations.
+    The returned array is read-only as it is shared by all sensors with the same FOV and subdivisions.
+
+    Parameters
+    ----------
+    deg_az_FOV : float
+        Azimuth FOV [deg]
+    deg_el_FOV : float
+        Elevation FOV [deg]
+    subdivisions : tuple[int, ...]
+        The number of samples of each of the four arcs
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Azimuth and elevation offsets [rad] of shape (2, sum(subdivisions))
+    """
+    rad_az_FOV = np.deg2rad(deg_az_FOV)
+    rad_el_FOV = np.deg2rad(deg_el_FOV)
+    rad_az_el_per_arc = []
+    for i_arc, num_subdivisions in enumerate(subdivisions):
+        fraction_arc = np.arange(num_subdivisions) / (num_subdivisions - 1)
+        sign = 1 if i_arc % 2 else -1
+        rad_az_el = np.empty((2, num_subdivisions), dtype=np.float64)
+        if i_arc < 2:
+            rad_az_el[0] = sign * rad_az_FOV / 2
+            rad_az_el[1] = -rad_el_FOV / 2 + rad_el_FOV * fraction_arc
+        else:
+            rad_az_el[0] = -rad_az_FOV / 2 + rad_az_FOV * fraction_arc
+            rad_az_el[1] = sign * rad_el_FOV / 2
+        rad_az_el_per_arc.append(rad_az_el)
+    rad_az_el_arcs = np.concatenate(rad_az_el_per_arc, axis=1)
+    rad_az_el_arcs.setflags(write=False)
+    return rad_az_el_arcs
@@ -1,5 +1,6 @@
 import numpy as np
 import numpy.typing as npt
+import shapely
 from shapely.geometry import Polygon
 from shapely.geometry.polygon import LinearRing
 
@@ -28,3 +29,31 @@ def linear_ring2LLA(
     linear_ring: LinearRing, m_alt: int | float = 0.0
 ) -> npt.NDArray[np.floating]:
     return make_LLA(linear_ring.coords, m_alt)
+
+
+def simplify_LLA(
+    ddm_LLA: npt.NDArray[np.floating], deg_tolerance: int | float
+) -> npt.NDArray[np.float64]:
+    """Simplify a line of points with the topology preserving Douglas-Peucker algorithm.
+
+    The first and last points are kept, so closed lines (e.g. borders) remain closed.
+
+    Parameters
+    ----------
+    ddm_LLA : npt.NDArray[np.floating]
+        Points of the line of shape [n, 3, 1] of lat, long, alt
+    deg_tolerance : int | float
+        Maximum distance of the removed points from the simplified line [deg]
+
+    Returns
+    -------
+    npt.NDArray[np.float64]
+        Points of the simplified line of shape [m, 3, 1] of lat, long, alt
+    """
+    if deg_tolerance < 0:
+        raise ValueError("The tolerance must not be negative.")
+    line = shapely.LineString(ddm_LLA[:, [1, 0, 2], 0])
+    dd_LLA: npt.NDArray[np.float64] = shapely.get_coordinates(
+        shapely.simplify(line, deg_tolerance, preserve_topology=True), include_z=True
+    )
+    return dd_LLA[:, [1, 0, 2], np.newaxis]
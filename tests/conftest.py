@@ -0,0 +1,11 @@
+import pytest
+
+from czml3_ext.definitions import ENV_CACHE_DIR
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path_factory, monkeypatch):
+    """Keep the binary border cache of the tests out of the home directory."""
+    path = tmp_path_factory.getbasetemp() / "cache"
+    monkeypatch.setenv(ENV_CACHE_DIR, str(path))
+    return path
@@ -1,13 +1,28 @@
+import datetime as dt
 import json
 from tempfile import mktemp
 from typing import Any
 
+import numpy as np
 import pytest
 from czml3 import CZML_VERSION, Document, Packet
 
+from czml3_ext import packets
 from czml3_ext.data import available_billboards, available_borders
+from czml3_ext.definitions import ENV_CACHE_DIR
 from czml3_ext.errors import BillboardNotFound, BorderNotFound
-from czml3_ext.helpers import combine_docs, get_billboard, get_border
+from czml3_ext.helpers import (
+    _load_border,
+    billboard_cache_info,
+    border_cache_info,
+    clear_billboard_cache,
+    clear_border_cache,
+    combine_docs,
+    get_billboard,
+    get_border,
+    png2base64,
+    write_combined_docs,
+)
 
 
 def test_billboard_names():
@@ -42,6 +57,48 @@ def test_get_border():
         get_border(b.removeprefix(".border"))
 
 
+def test_border_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(ENV_CACHE_DIR, str(tmp_path))
+    (tmp_path / "borders").mkdir()
+    path_stale = tmp_path / "borders" / "israel-1-2.npy"
+    path_other = tmp_path / "borders" / "israel-north-1-2.npy"
+    path_stale.touch()
+    path_other.touch()
+    clear_border_cache()
+    ddm_LLA = get_border("israel")
+    ddm_LLA_copy = get_border("Israel.border")
+    assert ddm_LLA_copy is not ddm_LLA
+    assert np.array_equal(ddm_LLA_copy, ddm_LLA)
+    info = border_cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+    assert len(list(tmp_path.rglob("israel-*-*.npy"))) == 2
+    assert not path_stale.exists()
+    assert path_other.exists()
+
+    # returned borders are copies that may be modified
+    ddm_LLA_copy[:, 2] = 100
+    assert np.all(get_border("israel")[:, 2] == 0)
+
+    # the binary border is memory mapped in a new process
+    clear_border_cache()
+    get_border("israel")
+    assert border_cache_info().misses == 1
+    ddm_LLA_npy = _load_border("israel.border")
+    assert isinstance(ddm_LLA_npy, np.memmap)
+    assert not ddm_LLA_npy.flags.writeable
+    assert np.array_equal(ddm_LLA_npy, ddm_LLA)
+
+    # binary caching is opt-in
+    for path in tmp_path.rglob("*.npy"):
+        path.unlink()
+    monkeypatch.delenv(ENV_CACHE_DIR)
+    clear_border_cache()
+    assert np.array_equal(get_border("israel"), ddm_LLA)
+    assert not list(tmp_path.rglob("*.npy"))
+    clear_border_cache()
+
+
 def test_get_billboard():
     for b in available_billboards:
         get_billboard(b)
@@ -50,6 +107,24 @@ def test_get_billboard():
         get_billboard(b.removeprefix(".billboard"))
 
 
+def test_billboard_cache(tmp_path):
+    clear_billboard_cache()
+    billboard = get_billboard("f16")
+    assert get_billboard("F16.billboard") is billboard
+    info = billboard_cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+    # png files are encoded again once modified
+    file_path = tmp_path / "icon.png"
+    file_path.write_bytes(b"\x89PNG0")
+    billboard = png2base64(file_path)
+    assert png2base64(str(file_path)) is billboard
+    file_path.write_bytes(b"\x89PNG01")
+    assert png2base64(file_path) != billboard
+    clear_billboard_cache()
+
+
 def test_combine_docs():
     p0: list[dict[str, Any]] = [
         {
@@ -136,3 +211,89 @@ def test_combine_docs():
             {"id": "TRAIN", "name": "TRAIN"},
         ]
     )
+
+
+def test_write_combined_docs(tmp_path):
+    preamble = {"id": "document", "name": "simple", "version": "1.0"}
+    packets = [
+        {
+            "id": f"p{i}",
+            "name": "x" * (i * 10),
+            "position": {"cartographicDegrees": [i, 1.5, -2e3]},
+        }
+        for i in range(20)
+    ]
+    f0 = tmp_path / "f0.czml"
+    f0.write_text(
+        " [\n" + ",\n ".join(json.dumps(p) for p in [preamble] + packets[:10]) + "\n]\n"
+    )
+    f1 = tmp_path / "f1.czml"
+    f1.write_text(json.dumps(packets[10:], separators=(",", ":")))
+    f_empty = tmp_path / "empty.czml"
+    f_empty.write_text("[ ]")
+    docs = (f0, packets[:2], f_empty, f1)
+
+    out = tmp_path / "out.czml"
+    with open(out, "w") as fp:
+        write_combined_docs(docs, fp, chunk_size=7)
+    assert out.read_text() == combine_docs(docs)
+    assert (
+        json.loads(out.read_text())
+        == [preamble] + packets[:10] + packets[:2] + packets[10:]
+    )
+
+    f_bad = tmp_path / "bad.czml"
+    for text in (
+        "",
+        "{}",
+        '[{"id": "document"} {"id": "a"}]',
+        '[{"id": "document"}, {"id": ',
+    ):
+        f_bad.write_text(text)
+        with pytest.raises(ValueError):
+            combine_docs((f_bad,))
+
+
+def test_combine_docs_orjson(tmp_path):
+    pytest.importorskip("orjson")
+    f = tmp_path / "f.czml"
+    f.write_text(json.dumps([{"id": "document", "version": "1.0"}, {"id": "A"}]))
+    d = Document(
+        packets=[
+            Packet(id="document", version=CZML_VERSION, name="test"),
+            Packet(id="TRAIN", name="TRAIN"),
+        ]
+    )
+    p: list[dict[str, Any]] = [
+        {"id": "B", "polyline": {"positions": {"cartographicDegrees": [1.5, 2.0, 0.0]}}}
+    ]
+    docs = (f, d, p)
+    out = combine_docs(docs, json_backend="orjson")
+    assert json.loads(out) == json.loads(combine_docs(docs))
+    assert ", " not in out
+    p[0]["polyline"]["positions"]["cartographicDegrees"] = np.array([1.5, 2, 0])
+    assert combine_docs(docs, json_backend="orjson") == out
+
+    # czml3 packets with time-dependent properties
+    ddm_LLA = np.zeros((3, 3, 1))
+    ddm_LLA[:, 0, 0] = [31, 31.5, 32]
+    ddm_LLA[:, 1, 0] = 34.5
+    d_sampled = Document(
+        packets=[Packet(id="document", version=CZML_VERSION, name="sampled")]
+        + packets.sensor_sampled(
+            dt.datetime(2024, 1, 1, tzinfo=dt.UTC),
+            np.arange(3) * 10.0,
+            ddm_LLA,
+            [0, 45, 90],
+            10,
+            200,
+            20,
+            1e4,
+        )
+        + packets.border("israel")
+    )
+    assert json.loads(combine_docs([d_sampled], json_backend="orjson")) == json.loads(
+        combine_docs([d_sampled])
+    )
+    with pytest.raises(ValueError):
+        combine_docs(docs, json_backend="ujson")  # type: ignore[arg-type]
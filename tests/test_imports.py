@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+import pytest
+
+LAZY_MODULES = ("rasterio", "shapely", "shapely.ops", "skimage")
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["czml3_ext.packets", "czml3_ext.rasters", "czml3_ext.helpers", "czml3_ext.data"],
+)
+def test_lazy_imports(module):
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; print(*(m for m in {LAZY_MODULES} if m in sys.modules))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_lazy_data_listings():
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import czml3_ext.helpers, czml3_ext.data as d; print(d._available.cache_info().currsize); "
+            "d.available_borders; print(d._available.cache_info().currsize)",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    assert out.stdout.split() == ["0", "1"]
@@ -0,0 +1,441 @@
+import datetime as dt
+import json
+from typing import Any
+
+import numpy as np
+import pytest
+import rasterio
+import shapely
+from czml3 import Packet
+from czml3.properties import (
+    Billboard,
+    Color,
+    Ellipsoid,
+    EllipsoidRadii,
+    Material,
+    Polygon,
+    PositionList,
+    SolidColorMaterial,
+)
+from transforms84.helpers import DDM2RRM, RRM2DDM
+from transforms84.systems import WGS84
+from transforms84.transforms import AER2ENU, ENU2ECEF, ECEF2geodetic
+
+from czml3_ext import packets
+from czml3_ext.errors import MismatchedInputsError
+from czml3_ext.helpers import (
+    _simplify_border,
+    get_billboard,
+    get_border,
+    png2base64,
+)
+
+
+def ddm_LLA_AER(ddm_LLA, deg_az, deg_el, m_distance):
+    return RRM2DDM(
+        ECEF2geodetic(
+            ENU2ECEF(
+                DDM2RRM(ddm_LLA),
+                AER2ENU(
+                    np.array([[np.deg2rad(deg_az)], [np.deg2rad(deg_el)], [m_distance]])
+                ),
+                WGS84.a,
+                WGS84.b,
+            ),
+            WGS84.a,
+            WGS84.b,
+        )
+    )
+
+
+def positions(packet):
+    packet_json = json.loads(packet.dumps())
+    graphics = (
+        packet_json["polyline"] if "polyline" in packet_json else packet_json["polygon"]
+    )
+    return np.array(graphics["positions"]["cartographicDegrees"])
+
+
+def test_sensor_num_packets():
+    ddm_LLA = np.array([[[31.4], [34.7], [1000.0]], [[31.5], [34.8], [0.0]]])
+    out = packets.sensor(ddm_LLA, [10, 20], [30, 0], [50, 300], [20, 10], [1e4, 2e4])
+    assert len(out) == 1 + 4 + 4
+    out = packets.sensor(
+        ddm_LLA, [10, 20], [30, 0], [50, 300], [20, 10], [1e4, 2e4], [5e3, 1e3]
+    )
+    assert len(out) == 4 + 1 + 4 + 8
+    out = packets.sensor(
+        ddm_LLA,
+        [10, 20],
+        [30, 0],
+        [50, 300],
+        [20, 10],
+        [1e4, 2e4],
+        [5e3, 1e3],
+        show_minimum_range_polyline=False,
+        ellipsoid=Ellipsoid(radii=EllipsoidRadii(cartesian=[0, 0, 0]), fill=True),
+    )
+    assert len(out) == 1 + 4 + 8 + 1
+
+
+def test_sensor_outline_points():
+    ddm_LLA = np.array([[31.4], [34.7], [1000.0]])
+    out = packets.sensor(ddm_LLA, 10, 30, 300, 20, 1e4, subdivisions=5)
+    assert len(out) == 4 + 4
+    corner = positions(out[0])
+    assert np.allclose(corner[:3], ddm_LLA[[1, 0, 2], 0])
+    assert np.allclose(corner[3:], ddm_LLA_AER(ddm_LLA, -140, 20, 1e4)[[1, 0, 2], 0])
+    elevation_arc = positions(out[4])
+    assert elevation_arc.size == 5 * 3
+    for i_arc, deg_el in enumerate(np.linspace(20, 40, 5)):
+        assert np.allclose(
+            elevation_arc[3 * i_arc : 3 * (i_arc + 1)],
+            ddm_LLA_AER(ddm_LLA, 220, deg_el, 1e4)[[1, 0, 2], 0],
+        )
+    azimuth_arc = positions(out[7])
+    for i_arc, deg_az in enumerate(np.linspace(-140, 160, 5)):
+        assert np.allclose(
+            azimuth_arc[3 * i_arc : 3 * (i_arc + 1)],
+            ddm_LLA_AER(ddm_LLA, deg_az, 40, 1e4)[[1, 0, 2], 0],
+        )
+
+
+def test_sensor_sampled():
+    num_samples = 4
+    ddm_LLA = np.zeros((num_samples, 3, 1))
+    ddm_LLA[:, 0, 0] = np.linspace(31, 32, num_samples)
+    ddm_LLA[:, 1, 0] = 34.5
+    deg_az_broadside = np.linspace(0, 90, num_samples)
+    s_time = np.arange(num_samples) * 10.0
+    out = packets.sensor_sampled(
+        dt.datetime(2024, 1, 1),
+        s_time,
+        ddm_LLA,
+        deg_az_broadside,
+        10,
+        200,
+        20,
+        1e4,
+        subdivisions=5,
+    )
+    packets_json = {p.id: json.loads(p.dumps()) for p in out}
+    polylines = [p for p in packets_json.values() if "polyline" in p]
+    assert len(polylines) == 4 + 4
+    assert len(out) == len(polylines) + 1 + 4 + 4 * 5
+    for i_sample in range(num_samples):
+        out_static = packets.sensor(
+            ddm_LLA[i_sample],
+            deg_az_broadside[i_sample],
+            10,
+            200,
+            20,
+            1e4,
+            subdivisions=5,
+        )
+        for polyline, packet_static in zip(polylines, out_static, strict=True):
+            samples = np.array(
+                [
+                    packets_json[r.removesuffix("#position")]["position"][
+                        "cartographicDegrees"
+                    ][4 * i_sample : 4 * (i_sample + 1)]
+                    for r in polyline["polyline"]["positions"]["references"]
+                ]
+            )
+            assert np.all(samples[:, 0] == s_time[i_sample])
+            assert np.allclose(samples[:, 1:].ravel(), positions(packet_static))
+
+
+def test_sensor_workers():
+    num_sensors = 7
+    ddm_LLA = np.zeros((num_sensors, 3, 1))
+    ddm_LLA[:, 0, 0] = np.linspace(31, 32, num_sensors)
+    ddm_LLA[:, 1, 0] = 34.5
+    args = (
+        ddm_LLA,
+        np.arange(num_sensors) * 10,
+        [10] * num_sensors,
+        [50, 200] * 3 + [300],
+        [20] * num_sensors,
+        [1e4] * num_sensors,
+        [0, 1e3] * 3 + [0],
+    )
+    kwargs: dict[str, Any] = {
+        "subdivisions": 5,
+        "name": [f"Sensor {i}" for i in range(num_sensors)],
+        "description": "A sensor",
+    }
+    out = [json.loads(p.dumps()) for p in packets.sensor(*args, **kwargs)]
+    for p in out:
+        p.pop("id")
+    for workers in (1, 2, 3):
+        out_workers = [
+            json.loads(p.dumps())
+            for p in packets.sensor(*args, workers=workers, **kwargs)
+        ]
+        assert len(out) == len(out_workers)
+        for p, p_workers in zip(out, out_workers, strict=True):
+            p_workers.pop("id")
+            assert p == p_workers
+
+
+def test_sensor_iter():
+    num_sensors = 5
+    ddm_LLA = np.zeros((num_sensors, 3, 1))
+    ddm_LLA[:, 0, 0] = np.linspace(31, 32, num_sensors)
+    ddm_LLA[:, 1, 0] = 34.5
+    args = (
+        ddm_LLA,
+        np.arange(num_sensors) * 10,
+        [10] * num_sensors,
+        [50, 200, 50, 200, 300],
+        [20] * num_sensors,
+        [1e4] * num_sensors,
+        [0, 1e3, 1e3, 0, 0],
+    )
+    kwargs: dict[str, Any] = {
+        "subdivisions": 5,
+        "name": [f"Sensor {i}" for i in range(num_sensors)],
+        "ellipsoid": Ellipsoid(radii=EllipsoidRadii(cartesian=[0, 0, 0]), fill=True),
+    }
+    out = [json.loads(p.dumps()) for p in packets.sensor(*args, **kwargs)]
+    packets_iter = packets.sensor_iter(*args, chunk_size=2, **kwargs)
+    assert not isinstance(packets_iter, list)
+    out_iter = [json.loads(p.dumps()) for p in packets_iter]
+    assert len(out) == len(out_iter)
+    for p, p_iter in zip(out, out_iter, strict=True):
+        p.pop("id")
+        p_iter.pop("id")
+        assert p == p_iter
+    with pytest.raises(MismatchedInputsError):
+        packets.sensor_iter(ddm_LLA, 0, 0, 10, 10, 1e4)
+
+
+def test_sensor_levels_of_detail():
+    ddm_LLA = np.array([[[31.4], [34.7], [1000.0]], [[31.5], [34.8], [0.0]]])
+    args = (ddm_LLA, [10, 20], [30, 0], [300, 50], [20, 10], [1e4, 2e4])
+    out = packets.sensor(*args, levels_of_detail=[(32, 1e5), (4, 1e6)])
+    assert len(out) == 4 + 4 + 4 + 1
+    polylines = [json.loads(p.dumps())["polyline"] for p in out[:12]]
+    distances = [
+        p["distanceDisplayCondition"]["distanceDisplayCondition"] for p in polylines
+    ]
+    assert distances == [[0, 1e6]] * 4 + [[0, 1e5]] * 4 + [[1e5, 1e6]] * 4
+    out_level = packets.sensor(*args, subdivisions=32)
+    for polyline, packet in zip(polylines[:8], out_level[:8], strict=True):
+        assert (
+            polyline["positions"]["cartographicDegrees"] == positions(packet).tolist()
+        )
+    for polyline in polylines[8:]:
+        assert len(polyline["positions"]["cartographicDegrees"]) == 4 * 3
+    with pytest.raises(ValueError):
+        packets.sensor(*args, levels_of_detail=[(32, 1e6), (4, 1e5)])
+
+
+def test_grid_spacing():
+    rng = np.random.default_rng(0)
+    ddm_LLA = np.zeros((50, 3, 1))
+    ddm_LLA[:, 0, 0] = 31 + rng.integers(0, 10, 50) * 0.1 + rng.normal(0, 1e-6, 50)
+    ddm_LLA[:, 1, 0] = 34 + rng.integers(0, 10, 50) * 0.2
+    out = packets.grid(ddm_LLA)
+    for i_axis, deg_zero_tolerance in enumerate([10e-5, 10e-5]):
+        deg_deltas = np.abs(ddm_LLA[:, i_axis, 0, None] - ddm_LLA[:, i_axis, 0])
+        deg_delta = np.min(deg_deltas[deg_deltas > deg_zero_tolerance])
+        corners = positions(out[0])[[1 - i_axis, 7 - i_axis]]
+        assert np.isclose(corners[1] - corners[0], deg_delta)
+    out = packets.grid(ddm_LLA[:1], deg_delta_lat=0.5, deg_delta_long=0.25)
+    assert np.allclose(
+        positions(out[0]).reshape((-1, 3))[0, :2],
+        [ddm_LLA[0, 1, 0] - 0.125, ddm_LLA[0, 0, 0] - 0.25],
+    )
+    with pytest.raises(ValueError):
+        packets.grid(ddm_LLA[:1])
+
+
+def test_grid_cut():
+    deg_lat, deg_long = np.meshgrid(
+        np.linspace(30, 31, 11), np.linspace(34, 35, 11), indexing="ij"
+    )
+    ddm_LLA = np.zeros((deg_lat.size, 3, 1))
+    ddm_LLA[:, 0, 0] = deg_lat.ravel()
+    ddm_LLA[:, 1, 0] = deg_long.ravel()
+    out = packets.grid(ddm_LLA)
+
+    # cells inside the border are not cut
+    ddm_LLA_cut = np.array(
+        [[29.0, 33.0, 0], [32.0, 33.0, 0], [32.0, 36.0, 0], [29.0, 36.0, 0]]
+    )
+    out_cut = packets.grid(ddm_LLA, ddm_LLA_cut=ddm_LLA_cut[:, :, None])
+    assert [positions(p).tolist() for p in out_cut] == [
+        positions(p).tolist() for p in out
+    ]
+
+    # cells on the boundary of the border are cut and cells outside of it are removed
+    ddm_LLA_cut[[0, 3], 0] = 30.42
+    out_cut = packets.grid(ddm_LLA, ddm_LLA_cut=ddm_LLA_cut[:, :, None])
+    assert len(out_cut) == 6 * 11 + 11
+    for p in out_cut[:11]:
+        assert np.allclose(positions(p).reshape((-1, 3))[:, 1].min(), 30.42)
+
+
+def test_grid_merge_cells():
+    deg_lat, deg_long = np.meshgrid(
+        np.linspace(30, 30.4, 5), np.linspace(34, 34.4, 5), indexing="ij"
+    )
+    ddm_LLA = np.zeros((deg_lat.size, 3, 1))
+    ddm_LLA[:, 0, 0] = deg_lat.ravel()
+    ddm_LLA[:, 1, 0] = deg_long.ravel()
+    # a centre cell and a separate corner cell of one style surrounded by another style
+    names = ["outer"] * deg_lat.size
+    names[12] = names[0] = "inner"
+    out = packets.grid(ddm_LLA, merge_cells=True, name=names)
+    out_json = [json.loads(p.dumps()) for p in out]
+    assert [p["name"] for p in out_json] == ["inner", "inner", "outer"]
+    polygon = shapely.Polygon(positions(out[2]).reshape((-1, 3))[:, :2])
+    assert np.isclose(polygon.area, 0.5**2 - 0.1**2, rtol=1e-4)
+    assert len(out_json[2]["polygon"]["holes"]["cartographicDegrees"]) == 1
+    for p in out[:2]:
+        polygon = shapely.Polygon(positions(p).reshape((-1, 3))[:, :2])
+        assert np.isclose(polygon.area, 0.1**2, rtol=1e-4)
+
+    # kwargs are compared by value, not by identity or order
+    polygons = [
+        Polygon(
+            positions=PositionList(cartographicDegrees=[0, 0, 0]),
+            material=Material(
+                solidColor=SolidColorMaterial(color=Color(rgba=[255, 0, 0, 255]))
+            ),
+        )
+        for _ in range(deg_lat.size)
+    ]
+    properties = [
+        {"a": 1, "b": np.float64(2)} if i % 2 else {"b": 2.0, "a": 1}
+        for i in range(deg_lat.size)
+    ]
+    out = packets.grid(
+        ddm_LLA, merge_cells=True, polygon=polygons, properties=properties
+    )
+    assert len(out) == 1
+
+
+def test_grid_raster(tmp_path):
+    data = np.arange(7 * 5, dtype=np.int16).reshape((7, 5))
+    path = tmp_path / "grid.tif"
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=7,
+        width=5,
+        count=1,
+        dtype=data.dtype,
+        crs="EPSG:4326",
+        transform=rasterio.transform.from_origin(34.0, 32.0, 0.1, 0.2),
+        nodata=34,
+    ) as dst:
+        dst.write(data, 1)
+
+    def classifier(values):
+        return np.where(values % 4 == 0, -1, values % 2)
+
+    out = list(
+        packets.grid_raster(path, classifier, 2, window_size=3, name=["even", "odd"])
+    )
+    is_cell = (data % 4 != 0) & (data != 34)
+    assert len(out) == np.count_nonzero(is_cell)
+    rows, cols = np.nonzero(is_cell)
+    ddm_LLA = np.zeros((rows.size, 3, 1))
+    ddm_LLA[:, 0, 0] = 32.0 - 0.2 * (rows + 0.5)
+    ddm_LLA[:, 1, 0] = 34.0 + 0.1 * (cols + 0.5)
+    names = ["odd" if v % 2 else "even" for v in data[rows, cols]]
+    out_grid = packets.grid(ddm_LLA, deg_delta_lat=0.2, deg_delta_long=0.1, name=names)
+    packets_grid = {(p.name, tuple(np.round(positions(p), 9))): p for p in out_grid}
+    for p in out:
+        assert (p.name, tuple(np.round(positions(p), 9))) in packets_grid
+    with pytest.raises(ValueError):
+        packets.grid_raster(path, classifier, 2, window_size=0)
+    with pytest.raises(ValueError):
+        list(packets.grid_raster(path, lambda values: values % 3, 2))
+
+
+def test_grid_sampled():
+    deg_lat, deg_long = np.meshgrid(
+        np.linspace(30, 30.2, 3), np.linspace(34, 34.2, 3), indexing="ij"
+    )
+    ddm_LLA = np.zeros((deg_lat.size, 3, 1))
+    ddm_LLA[:, 0, 0] = deg_lat.ravel()
+    ddm_LLA[:, 1, 0] = deg_long.ravel()
+    epoch = dt.datetime(2024, 1, 1)
+    s_time = np.arange(5) * 3600.0
+    values = np.tile([0.1, 0.2, 0.7, 0.9], (deg_lat.size, 1))
+    values[4] = 0.6
+    rgba_colormap = [[0, 0, 255, 255], [255, 0, 0, 255]]
+    out = packets.grid_sampled(
+        ddm_LLA,
+        epoch,
+        s_time,
+        values,
+        rgba_colormap,
+        [0.5],
+        name=[f"Square {i}" for i in range(deg_lat.size)],
+        description="A square",
+    )
+    assert len(out) == deg_lat.size
+    out_grid = packets.grid(ddm_LLA)
+    for i_centre, (p, p_grid) in enumerate(zip(out, out_grid, strict=True)):
+        assert p.name == f"Square {i_centre}"
+        assert p.description == "A square"
+        assert np.array_equal(positions(p), positions(p_grid))
+        intervals = json.loads(p.dumps())["polygon"]["material"]["solidColor"]["color"]
+        if i_centre == 4:
+            assert len(intervals) == 1
+            assert intervals[0]["rgba"] == [255, 0, 0, 255]
+            continue
+        assert len(intervals) == 2
+        assert intervals[0]["interval"].startswith("2024-01-01T00:00:00")
+        assert "/2024-01-01T02:00:00" in intervals[0]["interval"]
+        assert intervals[1]["interval"].endswith("2024-01-01T04:00:00.000000Z")
+        assert [i["rgba"] for i in intervals] == rgba_colormap
+    with pytest.raises(MismatchedInputsError):
+        packets.grid_sampled(ddm_LLA, epoch, s_time[:-1], values, rgba_colormap, [0.5])
+
+
+def test_border_tolerance():
+    ddm_LLA_border = get_border("israel")
+    dd_LL_border = shapely.LineString(ddm_LLA_border[:, [1, 0], 0])
+    out = packets.border(["israel", ddm_LLA_border], deg_tolerance=[1e-2, 1e-2])
+    assert np.array_equal(positions(out[0]), positions(out[1]))
+    dd_LL = positions(out[0]).reshape((-1, 3))[:, :2]
+    assert 3 < dd_LL.shape[0] < ddm_LLA_border.shape[0] / 10
+    assert np.array_equal(dd_LL[0], dd_LL[-1])
+    assert shapely.hausdorff_distance(shapely.LineString(dd_LL), dd_LL_border) <= 1e-2
+    num_hits = _simplify_border.cache_info().hits
+    assert np.array_equal(get_border("israel", 1e-2), get_border("Israel", 1e-2))
+    assert _simplify_border.cache_info().hits == num_hits + 2
+    assert np.array_equal(
+        positions(packets.border("israel", deg_tolerance=0)[0]),
+        positions(packets.border("israel")[0]),
+    )
+    with pytest.raises(ValueError):
+        packets.border("israel", deg_tolerance=-1)
+
+
+def test_billboard_image(tmp_path):
+    packet_image, reference = packets.billboard_image("f16")
+    assert json.loads(packet_image.dumps())["billboard"]["image"] == get_billboard(
+        "f16"
+    )
+    assert packets.billboard_image("F16")[0].id == packet_image.id
+    assert packets.billboard_image(get_billboard("f16"))[0].id == packet_image.id
+    assert packets.billboard_image("f22")[0].id != packet_image.id
+    packet = Packet(billboard=Billboard(image=reference, scale=0.5))
+    intervals = json.loads(packet.dumps())["billboard"]["image"]
+    assert len(intervals) == 1
+    assert intervals[0]["reference"] == f"{packet_image.id}#billboard.image"
+
+    file_path = tmp_path / "icon.png"
+    file_path.write_bytes(b"\x89PNG0")
+    packet_image, reference = packets.billboard_image(file_path, "icon")
+    assert packet_image.id == "icon"
+    assert json.loads(packet_image.dumps())["billboard"]["image"] == png2base64(
+        file_path
+    )
@@ -0,0 +1,241 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio import transform
+
+from czml3_ext import packets, rasters
+
+
+def make_raster(path, data, deg_long=34.0, **profile):
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=data.shape[0],
+        width=data.shape[1],
+        count=1,
+        dtype=data.dtype,
+        crs="EPSG:4326",
+        transform=transform.from_origin(
+            deg_long, 32, 1 / data.shape[1], 1 / data.shape[0]
+        ),
+        **profile,
+    ) as dst:
+        dst.write(data, 1)
+    return path
+
+
+@pytest.mark.parametrize(
+    "profile", [{}, {"tiled": True, "blockxsize": 64, "blockysize": 32}]
+)
+def test_ops_windows(tmp_path, monkeypatch, profile):
+    monkeypatch.setattr(rasters, "RASTER_WINDOW_NUM_PIXELS", 1000)
+    data = np.random.default_rng(0).integers(0, 10, (150, 130)).astype(np.int16)
+    raster_path = make_raster(tmp_path / "in.tif", data, **profile)
+    with rasterio.open(raster_path) as src:
+        assert len(list(rasters._windows(src, 1))) > 1
+    for tiled, compress, num_threads in ((False, None, 1), (True, "deflate", 3)):
+        out_path = rasters.ops(
+            raster_path,
+            [3, 7],
+            ["ge", "l"],
+            tiled=tiled,
+            compress=compress,
+            num_threads=num_threads,
+        )
+        with rasterio.open(out_path) as src:
+            assert np.array_equal(src.read(1), (data >= 3) & (data < 7))
+            assert src.profile.get("compress") == compress
+
+    out_path = tmp_path / "empty.tif"
+    with pytest.raises(ValueError):
+        rasters.ops(raster_path, 10, "ge", out_path=out_path)
+    assert not out_path.exists()
+
+
+def test_coverage_amount_threads(tmp_path):
+    rng = np.random.default_rng(0)
+    raster_paths = [
+        make_raster(
+            tmp_path / f"in_{i}.tif", rng.integers(0, 10, (150, 130)).astype(np.int16)
+        )
+        for i in range(3)
+    ]
+    out_path, values = rasters.coverage_amount(
+        raster_paths, 5, operation_per_raster="ge"
+    )
+    out_path_threads, values_threads = rasters.coverage_amount(
+        raster_paths, 5, operation_per_raster="ge", num_threads=2
+    )
+    assert values == values_threads
+    with rasterio.open(out_path) as src, rasterio.open(out_path_threads) as src_threads:
+        assert np.array_equal(src.read(1), src_threads.read(1))
+    with pytest.raises(ValueError):
+        rasters.coverage_amount(raster_paths, 5, num_threads=0)
+
+
+def test_coverage_amount_threads_single_raster(tmp_path, monkeypatch):
+    data = np.random.default_rng(0).integers(0, 10, (150, 130)).astype(np.int16)
+    raster_path = make_raster(tmp_path / "in.tif", data)
+    coverage = rasters.coverage_amount_in_memory(
+        [raster_path], 5, operation_per_raster="ge"
+    )[0].data
+    monkeypatch.setattr(rasters, "RASTER_WINDOW_NUM_PIXELS", 1000)
+    assert len(list(rasters._output_windows(slice(0, 150), slice(0, 130)))) > 1
+    for num_threads in (1, 4):
+        raster, values = rasters.coverage_amount_in_memory(
+            [raster_path], 5, operation_per_raster="ge", num_threads=num_threads
+        )
+        assert np.array_equal(raster.data, coverage)
+        assert np.array_equal(raster.data, data >= 5)
+        assert values == [0, 1]
+
+
+def test_coverage_amount_windows(tmp_path):
+    data = np.arange(100, dtype=np.int16).reshape((10, 10)) % 10
+    raster_paths = [
+        make_raster(tmp_path / f"in_{i}.tif", data, deg_long=34.0 + i * 1.5)
+        for i in range(2)
+    ]
+    out_path, values = rasters.coverage_amount(
+        raster_paths, 9, operation_per_raster="le"
+    )
+    with rasterio.open(out_path) as src:
+        coverage = src.read(1)
+    # pixels between the rasters and outside of them are not covered
+    assert coverage.shape == (10, 25)
+    assert np.all(coverage[:, :10] == 1)
+    assert np.all(coverage[:, 10:15] == 0)
+    assert np.all(coverage[:, 15:] == 1)
+    assert values == [0, 1]
+
+
+def test_coverage_amount_misaligned(tmp_path):
+    data = np.ones((10, 10), dtype=np.int16)
+    raster_paths = [
+        make_raster(tmp_path / f"in_{i}.tif", data, deg_long=deg_long)
+        for i, deg_long in enumerate((34.0, 35.03))
+    ]
+    raster, values = rasters.coverage_amount_in_memory(
+        raster_paths, 5, operation_per_raster="l"
+    )
+    # pixels are covered only if their centres are in a raster, on either side of the edges of the rasters
+    deg_long = (raster.transform * (np.arange(raster.data.shape[1]) + 0.5, 0))[0]
+    is_in_raster = ((deg_long > 34.0) & (deg_long < 35.0)) | (
+        (deg_long > 35.03) & (deg_long < 36.03)
+    )
+    assert np.array_equal(raster.data, np.tile(is_in_raster, (10, 1)))
+    assert values == [0, 1]
+
+
+def test_in_memory(tmp_path):
+    rng = np.random.default_rng(0)
+    raster_paths = [
+        make_raster(
+            tmp_path / f"in_{i}.tif",
+            rng.integers(0, 10, (150, 130)).astype(np.int16),
+            deg_long=34.0 + i * 0.5,
+        )
+        for i in range(2)
+    ]
+    raster = rasters.ops_in_memory(raster_paths[0], [3, 7], ["ge", "l"], num_threads=2)
+    with rasterio.open(rasters.ops(raster_paths[0], [3, 7], ["ge", "l"])) as src:
+        assert np.array_equal(raster.data, src.read(1))
+        assert raster.transform == src.transform
+        assert raster.crs == src.crs
+    assert np.array_equal(rasters.ops_in_memory(raster, 1).data, raster.data)
+
+    with rasterio.open(raster_paths[1]) as src:
+        raster_1 = rasters.Raster(src.read(1), src.transform, src.crs)
+    raster_coverage, values = rasters.coverage_amount_in_memory(
+        [raster_paths[0], raster_1], [5, 1], num_threads=2
+    )
+    out_path, values_file = rasters.coverage_amount(raster_paths, [5, 1])
+    assert values == values_file
+    with rasterio.open(out_path) as src:
+        assert np.array_equal(raster_coverage.data, src.read(1))
+        assert raster_coverage.transform == src.transform
+
+    # coverage from rasters in memory and from files are the same
+    out = packets.coverage(
+        rasters.ops_in_memory(raster_paths[0], 6, "ge"),
+        rasters.ops_in_memory(raster_paths[0], 8, "ge"),
+        name="coverage",
+    )
+    out_file = packets.coverage(
+        rasters.ops(raster_paths[0], 6, "ge"),
+        rasters.ops(raster_paths[0], 8, "ge"),
+        name="coverage",
+        delete_rasters=True,
+    )
+    assert len(out) == len(out_file) > 0
+    for p, p_file in zip(out, out_file, strict=True):
+        assert p.dumps().split(",", 1)[1] == p_file.dumps().split(",", 1)[1]
+    with pytest.raises(ValueError):
+        packets.coverage(raster_coverage)
+
+
+@pytest.mark.parametrize(
+    "profile", [{}, {"tiled": True, "blockxsize": 64, "blockysize": 32}]
+)
+def test_packed_mask(tmp_path, monkeypatch, profile):
+    monkeypatch.setattr(rasters, "RASTER_WINDOW_NUM_PIXELS", 1000)
+    data = np.random.default_rng(0).integers(0, 10, (150, 130)).astype(np.int16)
+    raster_path = make_raster(tmp_path / "in.tif", data, **profile)
+    raster = rasters.ops_in_memory(raster_path, [3, 7], ["ge", "l"])
+    for num_threads in (1, 3):
+        mask = rasters.ops_packed(
+            raster_path, [3, 7], ["ge", "l"], num_threads=num_threads
+        )
+        assert mask.bits.shape == (150, 17)
+        assert mask.width == 130
+        unpacked = mask.unpack()
+        assert np.array_equal(unpacked.data, raster.data)
+        assert unpacked.transform == raster.transform
+        assert unpacked.crs == raster.crs
+    assert np.array_equal(rasters.PackedMask.from_raster(raster).bits, mask.bits)
+    assert np.array_equal(rasters.ops_in_memory(mask, 1).data, raster.data)
+
+    out_path = rasters.ops(raster_path, [3, 7], ["ge", "l"])
+    out_path_packed = rasters.ops(raster_path, [3, 7], ["ge", "l"], bit_packed=True)
+    with rasterio.open(out_path) as src, rasterio.open(out_path_packed) as src_packed:
+        assert src_packed.tags(1, "IMAGE_STRUCTURE")["NBITS"] == "1"
+        assert np.array_equal(src.read(1), src_packed.read(1))
+    assert out_path_packed.stat().st_size < out_path.stat().st_size
+
+    # coverage from packed masks and from files are the same
+    out = packets.coverage(
+        rasters.ops_packed(raster_path, 6, "ge"), mask, name="coverage"
+    )
+    out_file = packets.coverage(
+        rasters.ops(raster_path, 6, "ge", bit_packed=True),
+        out_path_packed,
+        name="coverage",
+    )
+    assert len(out) == len(out_file) > 0
+    for p, p_file in zip(out, out_file, strict=True):
+        assert p.dumps().split(",", 1)[1] == p_file.dumps().split(",", 1)[1]
+
+
+def test_packed_mask_unaligned_blocks(tmp_path):
+    data = np.random.default_rng(0).integers(0, 10, (150, 230)).astype(np.int16)
+    raster_path = make_raster(tmp_path / "in.tif", data)
+    with rasterio.open(raster_path) as src:
+        geo_transform = ", ".join(map(str, src.transform.to_gdal()))
+    vrt_path = tmp_path / "in.vrt"
+    vrt_path.write_text(
+        f"""<VRTDataset rasterXSize="230" rasterYSize="150">
+  <SRS>EPSG:4326</SRS>
+  <GeoTransform>{geo_transform}</GeoTransform>
+  <VRTRasterBand dataType="Int16" band="1" blockXSize="100">
+    <SimpleSource>
+      <SourceFilename relativeToVRT="1">in.tif</SourceFilename>
+      <SourceBand>1</SourceBand>
+    </SimpleSource>
+  </VRTRasterBand>
+</VRTDataset>"""
+    )
+    with rasterio.open(vrt_path) as src:
+        assert src.block_shapes[0][1] == 100
+    mask = rasters.ops_packed(vrt_path, [3, 7], ["ge", "l"])
+    assert np.array_equal(mask.unpack().data, (data >= 3) & (data < 7))
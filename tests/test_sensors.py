@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pytest
+
+from czml3_ext import packets, sensors
+from czml3_ext.definitions import (
+    SENSOR_AZIMUTH_ARC,
+    SENSOR_CORNER,
+    SENSOR_ELEVATION_ARC,
+)
+from czml3_ext.errors import MismatchedInputsError
+
+
+def test_footprint_matches_sensor():
+    ddm_LLA = np.array([[[31.4], [34.7], [1000.0]], [[31.5], [34.8], [0.0]]])
+    args = (ddm_LLA, [10, 20], [30, 0], [50, 300], [20, 10], [1e4, 2e4], [5e3, 1e3])
+    out = sensors.footprint(*args, subdivisions=[8, 5])
+    polylines = [
+        json.loads(p.dumps())["polyline"]["positions"]["cartographicDegrees"]
+        for p in packets.sensor(*args, subdivisions=[8, 5])
+        if p.polyline is not None
+    ]
+    i_polyline = 0
+    for i_sensor in range(2):
+        out_sensor = out[out["sensor"] == i_sensor]
+        for i in np.unique(out_sensor["polyline"]):
+            points = out_sensor[out_sensor["polyline"] == i]
+            assert np.array_equal(points["point"], np.arange(points.size))
+            assert np.array_equal(
+                np.stack(
+                    (points["long"], points["lat"], points["alt"]), axis=1
+                ).ravel(),
+                polylines[i_polyline],
+            )
+            i_polyline += 1
+    assert i_polyline == len(polylines)
+
+
+def test_footprint_kinds():
+    out = sensors.footprint(np.array([[31.4], [34.7], [1000.0]]), 10, 30, 300, 20, 1e4)
+    assert out.dtype == sensors.FOOTPRINT_DTYPE
+    assert np.array_equal(
+        out["kind"][out["point"] == 0],
+        [SENSOR_CORNER] * 4 + [SENSOR_ELEVATION_ARC] * 2 + [SENSOR_AZIMUTH_ARC] * 2,
+    )
+    assert np.all(out["sensor"] == 0)
+    assert out.size == 4 * 2 + 4 * 64
+
+
+def test_footprint_mismatched_inputs():
+    with pytest.raises(MismatchedInputsError):
+        sensors.footprint(
+            np.array([[31.4], [34.7], [1000.0]]), [10, 20], 30, 300, 20, 1e4
+        )
+
+
+def test_arc_template_cache():
+    sensors.clear_arc_template_cache()
+    ddm_LLA = np.zeros((10, 3, 1))
+    ddm_LLA[:, 0, 0] = np.linspace(30, 31, 10)
+    ddm_LLA[:, 1, 0] = 34
+    deg_az_FOV = [120] * 5 + [200] * 5
+    args = (ddm_LLA, np.arange(10), [10] * 10, deg_az_FOV, [20] * 10, [1e4] * 10)
+    sensors.footprint(*args)
+    info = sensors.arc_template_cache_info()
+    assert info.misses == 2
+    assert info.hits == 0
+    assert info.currsize == 2
+    packets.sensor(*args)
+    info = sensors.arc_template_cache_info()
+    assert info.misses == 2
+    assert info.hits == 2
+    sensors.footprint(*args, subdivisions=10)
+    assert sensors.arc_template_cache_info().misses == 4
+
+
+def test_footprint_chord_error():
+    ddm_LLA = np.array([[[31.4], [34.7], [0.0]], [[31.5], [34.8], [0.0]]])
+    out = sensors.footprint(
+        ddm_LLA, [0, 0], [0, 60], [300] * 2, [20] * 2, [1e4, 4e5], m_chord_error_max=10
+    )
+    num_points = [
+        np.bincount(out["polyline"][(out["sensor"] == i) & (out["kind"] != 0)])[4:]
+        for i in range(2)
+    ]
+    num_segments_elevation_arc = np.ceil(
+        np.deg2rad(20) / (4 * np.arcsin(np.sqrt(10 / (2 * 4e5))))
+    )
+    assert np.all(num_points[1][:2] == num_segments_elevation_arc + 1)
+    assert num_points[0].sum() < num_points[1].sum()
+    # the azimuth arc at an elevation of 50 deg is longer than the one at 70 deg
+    assert num_points[1][2] > num_points[1][3]
+    with pytest.raises(ValueError):
+        sensors.footprint(ddm_LLA[0], 0, 0, 300, 20, 1e4, m_chord_error_max=0)